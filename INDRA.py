@@ -4,16 +4,97 @@ import os
 import sys
 from pathlib import Path
 import argparse
-import yaml # type: ignore
-from typing import Optional, Dict, Any
-import subprocess
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cached_property
+from typing import Optional, Dict, Any, Callable, Set, Tuple, Type
 
-from utils.expert_system import ExpertPanel # type: ignore
-from utils.config_handler import ConfigHandler # type: ignore
-from utils.purpose_parser import PurposeParser # type: ignore
+# Heavy dependencies (yaml, anthropic, httpx, expert system) are imported where
+# they are used so that `--help` and early configuration errors stay fast
 from utils.logging_setup import setup_logging # type: ignore
 from utils.exceptions import INDRAError # type: ignore
 
+# Characters not allowed in watershed names used for filenames
+_INVALID_NAME_CHARS = re.compile(r'[^\w-]+')
+
+# Prompt used to extract the watershed name from purpose text
+WATERSHED_PROMPT = """
+Extract only the watershed or river name from this text: %s
+Format your response as a single word or phrase, with no punctuation or extra text.
+For example, if input is "Model the flow in Mississippi River", respond with: Mississippi
+If multiple watersheds are mentioned, pick the main one.
+"""
+
+# Directory containing the CONFLUENCE package
+CONFLUENCE_PARENT_DIR = Path(__file__).resolve().parent.parent
+
+# Worker process reused across CONFLUENCE runs, created on first use
+_confluence_pool: Optional[ProcessPoolExecutor] = None
+
+def _preimport_confluence() -> None:
+    """Import CONFLUENCE once when the worker process starts."""
+    sys.path.append(str(CONFLUENCE_PARENT_DIR))
+    import CONFLUENCE.CONFLUENCE # type: ignore
+
+def _run_confluence_workflow(config_path: Path, log_path: Path) -> Dict[str, Any]:
+    """
+    Run the CONFLUENCE workflow in the worker and return its configuration.
+    
+    The worker's stdout and stderr are redirected to log_path for the duration
+    of the run, so CONFLUENCE output goes straight to disk.
+    """
+    from CONFLUENCE.CONFLUENCE import CONFLUENCE # type: ignore
+    
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+    try:
+        with open(log_path, 'wb') as log_file:
+            os.dup2(log_file.fileno(), 1)
+            os.dup2(log_file.fileno(), 2)
+            try:
+                confluence = CONFLUENCE(config_path)
+                confluence.run_workflow()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.dup2(saved_stdout, 1)
+                os.dup2(saved_stderr, 2)
+    finally:
+        os.close(saved_stdout)
+        os.close(saved_stderr)
+    
+    return dict(confluence.config)
+
+def _worker_ready() -> bool:
+    """No-op task used to start the CONFLUENCE worker ahead of time."""
+    return True
+
+def _get_confluence_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared CONFLUENCE worker pool.
+    
+    The worker is started from a fresh interpreter (forkserver, or spawn where
+    forkserver is unavailable) rather than forked from INDRA, so starting it
+    does not copy the page tables of a parent that already holds the API
+    clients and expert system.
+    """
+    global _confluence_pool
+    if _confluence_pool is None:
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _confluence_pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_preimport_confluence
+        )
+    return _confluence_pool
+
 class INDRA:
     """
     Intelligent Network for Dynamic River Analysis (INDRA)
@@ -22,6 +103,21 @@ class INDRA:
     analysis, and evaluation through AI-powered expert consultation.
     """
     
+    # Model-specific result handlers, by HYDROLOGICAL_MODEL
+    RESULT_HANDLERS = {
+        'SUMMA': '_get_summa_results',
+        'MESH': '_get_mesh_results'
+    }
+    
+    # Directory for CONFLUENCE run logs and how much of a log to echo to the logger
+    CONFLUENCE_LOG_DIR = Path('logs')
+    CONFLUENCE_LOG_TAIL_BYTES = 64 * 1024
+    
+    # Watershed names extracted from purpose text, keyed by purpose hash
+    WATERSHED_CACHE_FILE = Path.home() / '.cache' / 'indra' / 'watershed.json'
+    _watershed_cache: Dict[str, str] = {}
+    _watershed_cache_loaded = False
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
         if not self.api_key:
@@ -31,79 +127,164 @@ class INDRA:
         self.logger = setup_logging('INDRA')
         self.logger.info("Initializing INDRA system")
         
+        from utils.anthropic_client import get_client # type: ignore
+        from utils.config_handler import ConfigHandler # type: ignore
+        from utils.purpose_parser import PurposeParser # type: ignore
+        
+        # Shared Claude client so all components reuse one connection pool
+        self.api = get_client(self.api_key)
+        
         # Initialize components
         self.config_handler = ConfigHandler(self.logger)
-        self.purpose_parser = PurposeParser(self.api_key, self.logger)
+        self.purpose_parser = PurposeParser(self.api_key, self.logger, api=self.api)
+        self._messages_api = self.api.messages
         self.expert_panel = None
+        self._load_watershed_cache()
         
         # Initialize CONFLUENCE paths
         self.config_path = None
-        self.confluence = None
+        self.confluence_config: Optional[Dict[str, Any]] = None
 
     def run_confluence(self, config_path: Path) -> Dict[str, Any]:
+        """Execute CONFLUENCE model with given configuration."""
+        return asyncio.run(self.run_confluence_async(config_path))
+
+    async def run_confluence_async(self, config_path: Path) -> Dict[str, Any]:
         """
-        Execute CONFLUENCE model with given configuration.
+        Execute CONFLUENCE model with given configuration without blocking the event loop.
+        
+        CONFLUENCE runs in a persistent worker process, so its imports are
+        paid once per INDRA session while a crash in the model run cannot
+        take INDRA down with it.
         """
+        log_path = self.CONFLUENCE_LOG_DIR / f"confluence_{Path(config_path).stem}.log"
         try:
-            self.logger.info(f"Initializing CONFLUENCE with config: {config_path}")
-            
-            # Run CONFLUENCE as a subprocess
-            cmd = [
-                sys.executable,  # Current Python interpreter
-                str(Path(__file__).parent.parent / 'CONFLUENCE' / 'CONFLUENCE.py'),
-                '--config',
-                str(config_path)
-            ]
+            self.logger.info("Initializing CONFLUENCE with config: %s", config_path)
+            self.logger.info("CONFLUENCE output is written to %s", log_path)
+            self.CONFLUENCE_LOG_DIR.mkdir(parents=True, exist_ok=True)
             
-            self.logger.info(f"Running command: {' '.join(cmd)}")
-            
-            # Run the process
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            loop = asyncio.get_running_loop()
+            try:
+                self.confluence_config = await loop.run_in_executor(
+                    _get_confluence_pool(),
+                    _run_confluence_workflow,
+                    config_path,
+                    log_path
+                )
+            except Exception:
+                self._log_confluence_output(log_path, logging.ERROR)
+                raise
             
             self.logger.info("CONFLUENCE execution completed successfully")
-            self.logger.debug(f"CONFLUENCE output:\n{result.stdout}")
-            
-            if result.stderr:
-                self.logger.warning(f"CONFLUENCE stderr:\n{result.stderr}")
+            self._log_confluence_output(log_path, logging.DEBUG)
             
             # Get results
             results = self.get_confluence_results()
             return results
             
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"CONFLUENCE execution failed with code {e.returncode}")
-            self.logger.error(f"stdout:\n{e.stdout}")
-            self.logger.error(f"stderr:\n{e.stderr}")
-            raise INDRAError(f"CONFLUENCE execution failed with code {e.returncode}")
+        except INDRAError:
+            raise
         except Exception as e:
-            self.logger.error(f"Error running CONFLUENCE: {str(e)}")
+            self.logger.error("Error running CONFLUENCE: %s", e)
             raise INDRAError(f"CONFLUENCE execution failed: {str(e)}")
 
+    def _log_confluence_output(self, log_path: Path, level: int) -> None:
+        """Log the tail of a CONFLUENCE run log without reading the whole file."""
+        if not self.logger.isEnabledFor(level):
+            return
+        try:
+            with open(log_path, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - self.CONFLUENCE_LOG_TAIL_BYTES))
+                tail = f.read().decode('utf-8', errors='replace')
+        except OSError:
+            return
+        if tail:
+            self.logger.log(level, "CONFLUENCE output (end of %s):\n%s", log_path, tail)
+
+    def _parse_purpose_and_watershed(self, model_purpose: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Parse modeling purpose and extract the watershed name.
+        
+        Both are requested from a single Claude call. A cached watershed name
+        is reused when available, and the dedicated extraction prompt is used
+        as a fallback when the combined response has no usable name.
+        """
+        cache_key = self._watershed_cache_key(model_purpose)
+        if cache_key in self._watershed_cache:
+            return self.purpose_parser.parse(model_purpose), self._extract_watershed_name(model_purpose)
+        
+        parsed = self.purpose_parser.parse_with_watershed(model_purpose)
+        watershed_name = self._clean_watershed_name(parsed['watershed'])
+        if watershed_name:
+            self._watershed_cache[cache_key] = watershed_name
+        else:
+            watershed_name = self._extract_watershed_name(model_purpose)
+        
+        return parsed['purpose'], watershed_name
+
+    @staticmethod
+    def _watershed_cache_key(purpose_text: str) -> str:
+        """Cache key for a purpose text."""
+        return hashlib.blake2b(purpose_text.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _clean_watershed_name(watershed_name: str) -> str:
+        """Clean a watershed name for use in filenames."""
+        return _INVALID_NAME_CHARS.sub('', watershed_name).strip('-_')
+
+    @classmethod
+    def _load_watershed_cache(cls) -> None:
+        """Load persisted watershed names once per process and save them on exit."""
+        if cls._watershed_cache_loaded:
+            return
+        cls._watershed_cache_loaded = True
+        
+        try:
+            with open(cls.WATERSHED_CACHE_FILE, 'r') as f:
+                cls._watershed_cache.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        
+        atexit.register(cls._save_watershed_cache)
+
+    @classmethod
+    def _save_watershed_cache(cls) -> None:
+        """Persist cached watershed names to disk."""
+        if not cls._watershed_cache:
+            return
+        try:
+            cls.WATERSHED_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(cls.WATERSHED_CACHE_FILE, 'w') as f:
+                json.dump(cls._watershed_cache, f, indent=2)
+        except OSError:
+            pass
+
     def _extract_watershed_name(self, purpose_text: str) -> str:
         """
         Extract watershed name from purpose text.
         
+        Results are cached by a hash of the purpose text, so repeated runs
+        with the same purpose skip the API call.
+        
         Args:
             purpose_text: Natural language description of modeling purpose
             
         Returns:
             Extracted watershed name
         """
+        import anthropic # type: ignore
+        
+        cache_key = self._watershed_cache_key(purpose_text)
+        cached_name = self._watershed_cache.get(cache_key)
+        if cached_name:
+            self.logger.debug("Using cached watershed name: %s", cached_name)
+            return cached_name
+        
         try:
-            # Create a prompt to extract the watershed name
-            prompt = f"""
-            Extract only the watershed or river name from this text: {purpose_text}
-            Format your response as a single word or phrase, with no punctuation or extra text.
-            For example, if input is "Model the flow in Mississippi River", respond with: Mississippi
-            If multiple watersheds are mentioned, pick the main one.
-            """
+            prompt = WATERSHED_PROMPT % purpose_text
             
-            response = self.purpose_parser.api.messages.create(
+            response = self._messages_api.create(
                 model="claude-3-sonnet-20240229",
                 max_tokens=50,
                 temperature=0,
@@ -114,123 +295,166 @@ class INDRA:
             )
             
             watershed_name = response.content[0].text.strip()
-            self.logger.debug(f"Extracted watershed name: {watershed_name}")
+            self.logger.debug("Extracted watershed name: %s", watershed_name)
             
             # Clean the watershed name for use in filenames
-            cleaned_name = ''.join(c for c in watershed_name if c.isalnum() or c in ['-', '_']).strip('-_')
+            cleaned_name = self._clean_watershed_name(watershed_name)
             if not cleaned_name:
-                cleaned_name = "unnamed_watershed"
+                return "unnamed_watershed"
             
+            self._watershed_cache[cache_key] = cleaned_name
             return cleaned_name
             
-        except Exception as e:
-            self.logger.error(f"Error extracting watershed name: {str(e)}")
+        except (anthropic.APIError, IndexError) as e:
+            self.logger.error("Error extracting watershed name: %s", e)
             return "unnamed_watershed"
 
     def get_confluence_results(self) -> Dict[str, Any]:
         """Get results from CONFLUENCE execution."""
-        if not self.confluence:
+        if not self.confluence_config:
             raise INDRAError("CONFLUENCE not initialized")
             
         try:
             # Get config to find output locations
-            config = self.confluence.config
+            config = self.confluence_config
+            model = config['HYDROLOGICAL_MODEL']
             
             # Construct results dictionary
             results = {
                 'status': 'completed',
-                'output_dir': str(Path(config['CONFLUENCE_DATA_DIR']) / 
-                                f"domain_{config['DOMAIN_NAME']}/simulations/{config['EXPERIMENT_ID']}"),
-                'model': config['HYDROLOGICAL_MODEL']
+                'output_dir': str(self._simulation_dir(config)),
+                'model': model
             }
             
-            # Add model-specific results
-            if config['HYDROLOGICAL_MODEL'] == 'SUMMA':
-                results.update(self._get_summa_results(config))
-            elif config['HYDROLOGICAL_MODEL'] == 'MESH':
-                results.update(self._get_mesh_results(config))
-            # Add other models as needed
+            # Add model-specific results (register other models in RESULT_HANDLERS)
+            handler_name = self.RESULT_HANDLERS.get(model)
+            if handler_name:
+                results.update(getattr(self, handler_name)(config))
             
             return results
             
-        except Exception as e:
-            self.logger.error(f"Error getting CONFLUENCE results: {str(e)}")
+        except KeyError as e:
+            self.logger.error("Missing config key in CONFLUENCE results: %s", e)
             raise INDRAError(f"Failed to get results: {str(e)}")
 
     def run(self, model_purpose: str, config_path: Optional[Path] = None) -> Dict[str, Any]:
         """Main entry point for INDRA workflow."""
         try:
             self.logger.info("Starting INDRA workflow")
-            self.logger.info(f"Model purpose: {model_purpose}")
+            self.logger.info("Model purpose: %s", model_purpose)
             
-            # Parse modeling purpose
-            purpose_dict = self.purpose_parser.parse(model_purpose)
+            # Parse modeling purpose while loading any existing configuration
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                purpose_future = executor.submit(self._parse_purpose_and_watershed, model_purpose)
+                config_future = (
+                    executor.submit(self.config_handler.load_config, config_path)
+                    if config_path else None
+                )
+                purpose_dict, watershed_name = purpose_future.result()
+                config = config_future.result() if config_future else None
             self.logger.info("Parsed modeling requirements")
-            
-            # Extract watershed name
-            watershed_name = self._extract_watershed_name(model_purpose)
-            self.logger.info(f"Working with watershed: {watershed_name}")
+            self.logger.info("Working with watershed: %s", watershed_name)
             
             if config_path:
-                # Analyze existing configuration
-                self.logger.info(f"Analyzing existing configuration: {config_path}")
-                config = self.config_handler.load_config(config_path)
-                self.expert_panel = ExpertPanel(
-                    api_key=self.api_key,
-                    model_purpose=purpose_dict,
-                    logger=self.logger
-                )
-                analysis_results = self.expert_panel.analyze_config(config)
-                self.config_path = config_path
+                analysis_results = self._run_analyze(purpose_dict, config, config_path)
             else:
-                # Generate new configuration
-                self.logger.info("Generating new configuration")
-                self.expert_panel = ExpertPanel(
-                    api_key=self.api_key,
-                    model_purpose=purpose_dict,
-                    logger=self.logger
-                )
-                expert_recommendations = self.expert_panel.generate_config(purpose_dict)
-                
-                # Create and save configuration
-                config_content = self.config_handler.create_config(
-                    expert_recommendations=expert_recommendations,
-                    watershed_name=watershed_name
-                )
-                self.config_path = self.config_handler.save_config(config_content)
-                
-                # Run CONFLUENCE
-                self.logger.info("Running CONFLUENCE with generated configuration")
-                confluence_results = self.run_confluence(self.config_path)
-                
-                analysis_results = {
-                    "config": yaml.safe_load(config_content),
-                    "confluence_results": confluence_results
-                }
+                analysis_results = self._run_generate(purpose_dict, watershed_name)
             
             self.logger.info("INDRA workflow completed successfully")
             return analysis_results
             
         except Exception as e:
-            self.logger.error(f"Error in INDRA workflow: {str(e)}")
+            self.logger.error("Error in INDRA workflow: %s", e)
             raise
 
+    def _create_expert_panel(self, purpose_dict: Dict[str, Any]) -> None:
+        """Create the expert panel for a parsed modeling purpose."""
+        from utils.expert_system import ExpertPanel # type: ignore
+        
+        self.expert_panel = ExpertPanel(
+            api_key=self.api_key,
+            model_purpose=purpose_dict,
+            logger=self.logger,
+            api=self.api
+        )
+
+    def _run_analyze(self, purpose_dict: Dict[str, Any], config: Dict[str, Any], config_path: Path) -> Dict[str, Any]:
+        """Analyze an existing configuration with the expert panel."""
+        self.logger.info("Analyzing existing configuration: %s", config_path)
+        self._create_expert_panel(purpose_dict)
+        self.config_path = config_path
+        return self.expert_panel.analyze_config(config)
+
+    def _run_generate(self, purpose_dict: Dict[str, Any], watershed_name: str) -> Dict[str, Any]:
+        """Generate a new configuration and run CONFLUENCE with it."""
+        self.logger.info("Generating new configuration")
+        
+        # Start the CONFLUENCE worker (and its imports) while the experts work
+        _get_confluence_pool().submit(_worker_ready)
+        
+        self._create_expert_panel(purpose_dict)
+        expert_recommendations = self.expert_panel.generate_config(purpose_dict)
+        
+        # Create and save configuration
+        config_content, config_dict = self.config_handler.create_config(
+            expert_recommendations=expert_recommendations,
+            watershed_name=watershed_name
+        )
+        self.config_path = self.config_handler.save_config(config_content, config_dict=config_dict)
+        
+        # Run CONFLUENCE
+        self.logger.info("Running CONFLUENCE with generated configuration")
+        confluence_results = self.run_confluence(self.config_path)
+        
+        return {
+            "config": config_dict,
+            "confluence_results": confluence_results
+        }
+
+    @staticmethod
+    def _simulation_dir(config: Dict[str, Any]) -> Path:
+        """Simulation output directory for the configured domain and experiment."""
+        return Path(
+            config['CONFLUENCE_DATA_DIR'],
+            f"domain_{config['DOMAIN_NAME']}",
+            'simulations',
+            config['EXPERIMENT_ID']
+        )
+
+    @staticmethod
+    def _list_dir(directory: Path) -> Set[str]:
+        """Names of the entries in a directory, or an empty set if it cannot be read."""
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name for entry in entries}
+        except OSError:
+            return set()
+
     def _get_summa_results(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Get SUMMA-specific results."""
         results = {}
         try:
-            output_dir = Path(config['CONFLUENCE_DATA_DIR']) / f"domain_{config['DOMAIN_NAME']}"
+            experiment_id = config['EXPERIMENT_ID']
+            sim_dir = self._simulation_dir(config)
+            
+            streamflow_file = f"{experiment_id}.nc"
+            routing_entries = self._list_dir(Path(sim_dir, 'mizuRoute'))
+            summa_entries = self._list_dir(Path(sim_dir, 'SUMMA'))
             
             # Add paths to specific output files
             results['output_files'] = {
-                'streamflow': str(output_dir / 'simulations' / config['EXPERIMENT_ID'] / 
-                                'mizuRoute' / f"{config['EXPERIMENT_ID']}.nc"),
-                'state_files': str(output_dir / 'simulations' / config['EXPERIMENT_ID'] / 
-                                 'SUMMA' / 'stateFiles')
+                'streamflow': {
+                    'path': str(Path(sim_dir, 'mizuRoute', streamflow_file)),
+                    'exists': streamflow_file in routing_entries
+                },
+                'state_files': {
+                    'path': str(Path(sim_dir, 'SUMMA', 'stateFiles')),
+                    'exists': 'stateFiles' in summa_entries
+                }
             }
             
-        except Exception as e:
-            self.logger.warning(f"Error getting SUMMA results: {str(e)}")
+        except KeyError as e:
+            self.logger.warning("Missing config key for SUMMA results: %s", e)
             
         return results
 
@@ -238,31 +462,73 @@ class INDRA:
         """Get MESH-specific results."""
         results = {}
         try:
-            output_dir = Path(config['CONFLUENCE_DATA_DIR']) / f"domain_{config['DOMAIN_NAME']}"
+            experiment_id = config['EXPERIMENT_ID']
+            sim_dir = self._simulation_dir(config)
+            
+            streamflow_file = f"{experiment_id}.txt"
+            mesh_entries = self._list_dir(Path(sim_dir, 'MESH'))
             
             # Add paths to specific output files
             results['output_files'] = {
-                'streamflow': str(output_dir / 'simulations' / config['EXPERIMENT_ID'] / 
-                                'MESH' / f"{config['EXPERIMENT_ID']}.txt"),
-                'diagnostics': str(output_dir / 'simulations' / config['EXPERIMENT_ID'] / 
-                                 'MESH' / 'diagnostics')
+                'streamflow': {
+                    'path': str(Path(sim_dir, 'MESH', streamflow_file)),
+                    'exists': streamflow_file in mesh_entries
+                },
+                'diagnostics': {
+                    'path': str(Path(sim_dir, 'MESH', 'diagnostics')),
+                    'exists': 'diagnostics' in mesh_entries
+                }
             }
             
-        except Exception as e:
-            self.logger.warning(f"Error getting MESH results: {str(e)}")
+        except KeyError as e:
+            self.logger.warning("Missing config key for MESH results: %s", e)
             
         return results
     
+    @cached_property
+    def _config_validator(self) -> Optional[Tuple[Callable[[Dict[str, Any]], Any], Type[Exception]]]:
+        """
+        JSON schema validator for the template fields and the error it raises.
+        
+        Compiled on first use, so the template is not read at startup; None
+        if fastjsonschema is not installed.
+        """
+        try:
+            import fastjsonschema # type: ignore
+        except ImportError:
+            return None
+        
+        schema = {
+            'type': 'object',
+            'required': list(self.config_handler.template_dict.keys()),
+            'properties': {
+                field: {'enum': valid_values}
+                for field, valid_values in self.config_handler.VALID_OPTIONS.items()
+            }
+        }
+        return fastjsonschema.compile(schema), fastjsonschema.JsonSchemaException
+
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """
         Validate configuration against CONFLUENCE requirements.
         
+        Uses the compiled schema validator when available. Invalid configurations
+        are passed on to the config handler, which reports the detailed errors.
+        
         Args:
             config: Configuration dictionary to validate
             
         Returns:
             bool: True if configuration is valid
         """
+        validator = self._config_validator
+        if validator is not None:
+            validate, schema_error = validator
+            try:
+                validate(config)
+                return True
+            except schema_error:
+                pass
         return self.config_handler.validate_config(config)
 
 def main():
@@ -289,6 +555,12 @@ def main():
     
     args = parser.parse_args()
     
+    import yaml # type: ignore
+    try:
+        from yaml import CSafeDumper as YamlDumper # type: ignore
+    except ImportError:
+        from yaml import SafeDumper as YamlDumper # type: ignore
+    
     try:
         indra = INDRA(api_key=args.api_key)
         results = indra.run(
@@ -297,7 +569,7 @@ def main():
         )
         print("INDRA workflow completed successfully")
         print("\nResults:")
-        print(yaml.dump(results, default_flow_style=False))
+        print(yaml.dump(results, Dumper=YamlDumper, default_flow_style=False, sort_keys=False))
         
     except INDRAError as e:
         print(f"Error: {str(e)}", file=sys.stderr)
@@ -1,14 +1,38 @@
 import yaml # type: ignore
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
-import requests # type: ignore
+from typing import Callable, Dict, Any, List, Optional, Tuple, TypeVar
+import httpx # type: ignore
+import ast
+import hashlib
+import io
+import itertools
 import json
 import os
+import re
 import sys
+import copy
+import shelve
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper # type: ignore
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper # type: ignore
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from CONFLUENCE.CONFLUENCE import CONFLUENCE # type: ignore
+from utils.json_utils import json_dumps, json_loads # type: ignore
+from utils.parse_cache import load_parse, store_parse # type: ignore
 TEMPLATE_CONFIG_PATH = Path(__file__).parent / '0_config_files' / 'config_template.yaml'
+_COMMENT_LINE_RE = re.compile(r'\s*#')
+_CONFIG_LINE_RE = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*:\s*([^#\n]*?)\s*(?:#\s*(.*?))?\s*$')
+_CONFIG_DICT_RE = re.compile(r'config\s*=\s*(\{.*?\})', re.S)
+_SUGGESTIONS_DICT_RE = re.compile(r'suggestions\s*=\s*(\{.*?\})', re.S)
+
+T = TypeVar('T')
 
 CONFLUENCE_OVERVIEW = """
 CONFLUENCE (Community Optimization and Numerical Framework for Large-domain Understanding of Environmental Networks and Computational Exploration) is an integrated hydrological modeling platform. It combines various components for data management, model setup, optimization, uncertainty analysis, forecasting, and visualization across multiple scales and regions.
@@ -74,85 +98,218 @@ EXPERT_PROMPTS = {
     """
 }
 
+# Static prompt prefixes, built once instead of on every analyze_settings call
+_ANALYZE_PREFIX = {
+    name: sys.intern(prompt + "\n\nAnalyze the following CONFLUENCE model settings:\n\n")
+    for name, prompt in EXPERT_PROMPTS.items()
+}
+
+PERCEPTUAL_MODEL_PROMPT = '''Based on the following CONFLUENCE model domain, generate a detailed and extensive perceptual model summary for the domain being modelled, 
+                     citing the relevant literature and providing a list of references. Include key  processes and their interaction. 
+                     Summarize previous modelling efforts in this basin and their findings. Identify modelling approaches that have provided good results or 
+                     are likely to provide good results. Also identify (if available in the literature) modelling approaches that have not proven fruitful.:\n\n'''
+
 class AnvilGPTAPI:
     """A wrapper for the Anvil GPT API."""
     
-    def __init__(self, bearer_token: str):
+    def __init__(self, bearer_token: str, cache_path: Optional[Path] = None):
         self.bearer_token = bearer_token
         self.url = "https://anvilgpt.rcac.purdue.edu/ollama/api/chat"
         
-    def generate_text(self, prompt: str, system_message: str, max_tokens: int = 1750) -> str:
-        """Generate text using the Anvil GPT API."""
+        # Responses are cached on disk by prompt, so re-running INDRA on an
+        # unchanged configuration skips the LLM round-trips entirely
+        self.cache_path = cache_path
+        self._cache_lock = threading.Lock()
+        
+        # One pooled client for all experts; over HTTP/2 the concurrent
+        # expert calls are multiplexed on a single connection
         headers = {
             "Authorization": f"Bearer {self.bearer_token}",
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate"
+        }
+        timeout = httpx.Timeout(120.0, connect=5.0)
+        limits = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+        try:
+            transport = httpx.HTTPTransport(http2=True, retries=3, limits=limits)
+        except ImportError:
+            # HTTP/2 support requires the optional 'h2' package
+            transport = httpx.HTTPTransport(retries=3, limits=limits)
+        self.client = httpx.Client(headers=headers, timeout=timeout, transport=transport)
+        
+        # Request fields that are the same on every call
+        self._body_template = {
+            "model": "llama3.1:latest",
+            "stream": True
         }
         
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt}
-        ]
-        
+    def _cache_key(self, prompt: str, system_message: str, max_tokens: int) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (system_message, prompt, str(max_tokens)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        if self.cache_path is None:
+            return None
+        with self._cache_lock:
+            try:
+                with shelve.open(str(self.cache_path), flag='r') as cache:
+                    return cache.get(key)
+            except Exception:
+                # Missing or unreadable cache is just a miss
+                return None
+    
+    def _cache_put(self, key: str, text: str):
+        if self.cache_path is None:
+            return
+        with self._cache_lock:
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with shelve.open(str(self.cache_path)) as cache:
+                    cache[key] = text
+            except Exception as e:
+                print(f"Could not write response cache: {e}")
+    
+    def _cache_delete(self, key: str):
+        if self.cache_path is None:
+            return
+        with self._cache_lock:
+            try:
+                with shelve.open(str(self.cache_path)) as cache:
+                    cache.pop(key, None)
+            except Exception as e:
+                print(f"Could not update response cache: {e}")
+    
+    def generate_text(self, prompt: str, system_message: str, max_tokens: int = 1750) -> str:
+        """Generate text using the Anvil GPT API."""
+        cache_key = self._cache_key(prompt, system_message, max_tokens)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        text = self._request_text(prompt, system_message, max_tokens)
+        self._cache_put(cache_key, text)
+        return text
+    
+    def generate_parsed(self, prompt: str, system_message: str, parse: Callable[[str], T],
+                        max_tokens: int = 1750) -> T:
+        """
+        Generate text and return parse(text).
+
+        The reply is only cached once it parses, and a cached reply that no
+        longer parses is evicted and requested again, so a malformed reply is
+        not replayed on later runs. Errors from parse are raised unchanged.
+        """
+        cache_key = self._cache_key(prompt, system_message, max_tokens)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            try:
+                return parse(cached)
+            except Exception:
+                self._cache_delete(cache_key)
+        
+        text = self._request_text(prompt, system_message, max_tokens)
+        result = parse(text)
+        self._cache_put(cache_key, text)
+        return result
+    
+    def _request_text(self, prompt: str, system_message: str, max_tokens: int) -> str:
+        """Request text from the Anvil GPT API, bypassing the response cache."""
         body = {
-            "model": "llama3.1:latest",
-            "messages": messages,
-            "stream": True,
+            **self._body_template,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
             "max_tokens": max_tokens
         }
         
         try:
-            response = requests.post(self.url, headers=headers, json=body)
-            response.raise_for_status()
-            
-            full_response = ""
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        json_response = json.loads(line)
-                        if 'message' in json_response:
-                            content = json_response['message'].get('content', '')
-                            full_response += content
-                    except json.JSONDecodeError as e:
-                        print(f"Error decoding JSON: {e}")
-                        continue
+            chunks: List[str] = []
+            with self.client.stream("POST", self.url, content=json_dumps(body)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        try:
+                            json_response = json_loads(line)
+                            if 'message' in json_response:
+                                chunks.append(json_response['message'].get('content', ''))
+                        except json.JSONDecodeError as e:
+                            print(f"Error decoding JSON: {e}")
+                            continue
                         
-            return full_response.strip()
+            return "".join(chunks).strip()
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise Exception(f"AnvilGPT API error: {str(e)}")
 
+    def generate_text_multi(self, prompts: List[Tuple[str, str]], delimiter: str = "===SECTION===",
+                            max_tokens: int = 1750) -> List[str]:
+        """
+        Answer several (prompt, system_message) pairs in a single API call.
+
+        The model is asked to separate its answers with a delimiter line; a
+        ValueError is raised if the reply does not contain one section per prompt.
+        """
+        if len(prompts) == 1:
+            prompt, system_message = prompts[0]
+            return [self.generate_text(prompt, system_message, max_tokens)]
+        
+        system_message = (
+            f"You will answer {len(prompts)} separate requests, each in the role it names. "
+            f"Answer them in order and separate consecutive answers with a line containing only {delimiter}. "
+            f"Do not number the answers or repeat the requests."
+        )
+        prompt = "\n\n".join(
+            f"Request {i} ({role})\n{request}"
+            for i, (request, role) in enumerate(prompts, 1)
+        )
+        max_tokens *= len(prompts)
+        
+        def split(response: str) -> List[str]:
+            sections = [section.strip() for section in response.split(delimiter)]
+            if len(sections) != len(prompts):
+                raise ValueError(f"Expected {len(prompts)} sections in batched response, got {len(sections)}")
+            return sections
+        
+        return self.generate_parsed(prompt, system_message, split, max_tokens)
+
 class Expert:
     def __init__(self, name: str, expertise: str, api: AnvilGPTAPI):
         self.name = name
         self.expertise = expertise
         self.api = api
         self.prompt = EXPERT_PROMPTS[name]
+        self.system_role: Optional[str] = None
 
-    def analyze_settings(self, settings: Dict[str, Any], confluence_results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        summarized_settings = summarize_settings(settings)
+    def analyze_settings(self, summarized_settings: str, confluence_results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         system_message = f"You are a world-class expert in {self.expertise} with extensive knowledge of the CONFLUENCE model."
-        prompt = f"{self.prompt}\n\nAnalyze the following CONFLUENCE model settings:\n\n{summarized_settings}"
-        
+        parts = [_ANALYZE_PREFIX[self.name], summarized_settings]
         if confluence_results:
-            prompt += f"\n\nCONFLUENCE Results: {confluence_results}"
+            parts.append(f"\n\nCONFLUENCE Results: {confluence_results}")
+        prompt = "".join(parts)
         
         analysis = self.api.generate_text(prompt, system_message)
         return {"full_analysis": analysis}
 
-class HydrologistExpert(Expert):
-    def __init__(self, api: AnvilGPTAPI):
-        super().__init__("Hydrologist Expert", "hydrological processes and model structure", api)
+    def perceptual_model_request(self, summarized_settings: str) -> Tuple[str, str]:
+        """Return the (prompt, system_message) pair for this expert's perceptual model."""
+        if self.system_role is None:
+            raise ValueError(f"Expert '{self.name}' has no system role, so it does not generate perceptual models")
+        return PERCEPTUAL_MODEL_PROMPT + summarized_settings, f"You are a {self.system_role}."
 
-    def generate_perceptual_model(self, settings: Dict[str, Any]) -> str:
-        summarized_settings = summarize_settings(settings)
-        system_message = "You are a world-class hydrologist."
-        prompt = f'''Based on the following CONFLUENCE model domain, generate a detailed and extensive perceptual model summary for the domain being modelled, 
-                     citing the relevant literature and providing a list of references. Include key  processes and their interaction. 
-                     Summarize previous modelling efforts in this basin and their findings. Identify modelling approaches that have provided good results or 
-                     are likely to provide good results. Also identify (if available in the literature) modelling approaches that have not proven fruitful.:\n\n{summarized_settings}'''
+    def generate_perceptual_model(self, summarized_settings: str) -> str:
+        prompt, system_message = self.perceptual_model_request(summarized_settings)
         perceptual_model = self.api.generate_text(prompt, system_message)
         return perceptual_model
 
+class HydrologistExpert(Expert):
+    def __init__(self, api: AnvilGPTAPI):
+        super().__init__("Hydrologist Expert", "hydrological processes and model structure", api)
+        self.system_role = "world-class hydrologist"
+
 class DataScienceExpert(Expert):
     def __init__(self, api: AnvilGPTAPI):
         super().__init__("Data Science Expert", "data science and preprocessing for hydrological models", api)
@@ -160,56 +317,43 @@ class DataScienceExpert(Expert):
 class HydrogeologyExpert(Expert):
     def __init__(self, api: AnvilGPTAPI):
         super().__init__("Hydrogeology Expert", "parameter estimation and optimization for hydrological models", api)
+        self.system_role = "world-class hydrogeologist"
     
-    def generate_perceptual_model(self, settings: Dict[str, Any]) -> str:
-        summarized_settings = summarize_settings(settings)
-        system_message = "You are a world-class hydrogeologist."
-        prompt = f'''Based on the following CONFLUENCE model domain, generate a detailed and extensive perceptual model summary for the domain being modelled, 
-                     citing the relevant literature and providing a list of references. Include key  processes and their interaction. 
-                     Summarize previous modelling efforts in this basin and their findings. Identify modelling approaches that have provided good results or 
-                     are likely to provide good results. Also identify (if available in the literature) modelling approaches that have not proven fruitful.:\n\n{summarized_settings}'''
-        perceptual_model = self.api.generate_text(prompt, system_message)
-        return perceptual_model
-
 class MeteorologicalExpert(Expert):
     def __init__(self, api: AnvilGPTAPI):
         super().__init__("Meteorological Expert", "evaluation of hydrological model performance", api)
+        self.system_role = "world-class meteorologist"
     
-    def generate_perceptual_model(self, settings: Dict[str, Any]) -> str:
-        summarized_settings = summarize_settings(settings)
-        system_message = "You are a world-class meteorologist."
-        prompt = f'''Based on the following CONFLUENCE model domain, generate a detailed and extensive perceptual model summary for the domain being modelled, 
-                     citing the relevant literature and providing a list of references. Include key  processes and their interaction. 
-                     Summarize previous modelling efforts in this basin and their findings. Identify modelling approaches that have provided good results or 
-                     are likely to provide good results. Also identify (if available in the literature) modelling approaches that have not proven fruitful.:\n\n{summarized_settings}'''
-        perceptual_model = self.api.generate_text(prompt, system_message)
-        return perceptual_model
-
 class Chairperson:
     def __init__(self, experts: List[Expert], api: AnvilGPTAPI):
         self.experts = experts
         self.api = api
 
     def load_control_file(self, file_path: Path) -> Dict[str, Any]:
-        with open(file_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_yaml_file(file_path)
 
     def consult_experts(self, settings: Dict[str, Any], confluence_results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        synthesis = {}
-        for expert in self.experts:
-            synthesis[expert.name] = expert.analyze_settings(settings, confluence_results)
-        return synthesis
+        # Summarize once; every expert sees the same settings
+        summarized_settings = summarize_settings(settings)
+        
+        # Experts are independent, so query them concurrently
+        with ThreadPoolExecutor(max_workers=max(len(self.experts), 1)) as executor:
+            futures = {
+                expert.name: executor.submit(expert.analyze_settings, summarized_settings, confluence_results)
+                for expert in self.experts
+            }
+            return {name: future.result() for name, future in futures.items()}
 
     def generate_report(self, settings: Dict[str, Any], synthesis: Dict[str, Any], confluence_results: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
         summarized_settings = summarize_settings(settings)
         
         system_message = "You are the chairperson of INDRA."
-        prompt = f"Summarize the following expert analyses as a panel discussion:\n\n"
-        for expert_name, analysis in synthesis.items():
-            prompt += f"{expert_name} Analysis: {analysis['full_analysis']}\n\n"
-        
+        parts = ["Summarize the following expert analyses as a panel discussion:\n\n"]
+        parts.extend(f"{expert_name} Analysis: {analysis['full_analysis']}\n\n"
+                     for expert_name, analysis in synthesis.items())
         if confluence_results:
-            prompt += f"CONFLUENCE Results: {confluence_results}\n\n"
+            parts.append(f"CONFLUENCE Results: {confluence_results}\n\n")
+        prompt = "".join(parts)
         
         panel_summary = self.api.generate_text(prompt, system_message)
         
@@ -244,12 +388,18 @@ class Chairperson:
         <Brief summary of suggestions and impact>
         """
 
-        response = self.api.generate_text(prompt, system_message)
-        
+        return self.api.generate_parsed(prompt, system_message, self._parse_suggestions)
+
+    @staticmethod
+    def _parse_suggestions(response: str) -> Dict[str, Any]:
+        """Parse the suggestions dictionary out of a reply; raises ValueError if it is missing."""
+        if "SUGGESTIONS DICTIONARY:" not in response:
+            raise ValueError("Suggestions dictionary not found in response")
         dict_part = response.split("SUGGESTIONS DICTIONARY:")[1].split("SUMMARY:")[0].strip()
-        local_vars = {}
-        exec(dict_part, globals(), local_vars)
-        suggestions = local_vars['suggestions']
+        match = _SUGGESTIONS_DICT_RE.search(dict_part)
+        if not match:
+            raise ValueError("Suggestions dictionary not found in response")
+        suggestions = ast.literal_eval(match.group(1))
 
         return suggestions
 
@@ -289,89 +439,7 @@ class Chairperson:
         
         try:
             print("\nRequesting configuration from AnvilGPT...")
-            response = self.api.generate_text(prompt, system_message)
-            
-            print("\nParsing response...")
-            print(f"Response length: {len(response)}")
-            
-            # First, try to extract the code block
-            if "```python" not in response:
-                print("\nNo Python code block found. Looking for config dictionary directly...")
-                # Try to find the config dictionary directly
-                if "config = {" in response:
-                    start_idx = response.find("config = {")
-                    end_idx = response.find("}", start_idx) + 1
-                    code_block = response[start_idx:end_idx]
-                else:
-                    raise ValueError("Could not find configuration dictionary in response")
-            else:
-                # Split by code block markers
-                parts = response.split("```")
-                if len(parts) < 3:
-                    print("\nIncomplete code block found. Response parts:", len(parts))
-                    raise ValueError("Incomplete code block in response")
-                
-                # Get the python code block (should be the second part)
-                code_block = parts[1].replace('python', '').strip()
-            
-            print("\nExtracting configuration...")
-            print(f"Code block found: {code_block[:100]}...")  # Print first 100 chars
-            
-            # Create a new dictionary to store the configuration
-            local_vars = {}
-            
-            try:
-                # Execute the code block in a safe context
-                exec(code_block, {"__builtins__": {}}, local_vars)
-            except Exception as e:
-                print(f"\nError executing code block: {str(e)}")
-                print("Code block content:")
-                print(code_block)
-                raise
-            
-            # Get the config dictionary
-            if 'config' not in local_vars:
-                raise ValueError("Configuration dictionary not found in response")
-            
-            config = local_vars['config']
-            print("\nConfiguration extracted successfully.")
-            
-            # Extract justification (everything after the configuration)
-            try:
-                if "```" in response:
-                    justification = response.split("```")[-1].strip()
-                else:
-                    end_idx = response.find("}", response.find("config = {")) + 1
-                    justification = response[end_idx:].strip()
-                
-                if not justification:
-                    justification = "No detailed justification provided in the response."
-            except Exception as e:
-                print(f"\nError extracting justification: {str(e)}")
-                justification = "Error extracting justification from response."
-            
-            print("\nValidating configuration...")
-            # Validate the required keys are present
-            required_keys = {
-                "HYDROLOGICAL_MODEL", "ROUTING_MODEL", "FORCING_DATASET", 
-                "STREAM_THRESHOLD", "DOMAIN_DISCRETIZATION", "ELEVATION_BAND_SIZE", 
-                "MIN_HRU_SIZE", "POUR_POINT_COORDS", "BOUNDING_BOX_COORDS"
-            }
-            
-            missing_keys = required_keys - set(config.keys())
-            if missing_keys:
-                raise ValueError(f"Missing required configuration keys: {missing_keys}")
-                
-            # Validate the values
-            if not isinstance(config["HYDROLOGICAL_MODEL"], str) or config["HYDROLOGICAL_MODEL"] not in ["SUMMA", "FLASH"]:
-                raise ValueError("Invalid HYDROLOGICAL_MODEL value")
-            if not isinstance(config["ROUTING_MODEL"], str) or config["ROUTING_MODEL"] != "mizuroute":
-                raise ValueError("Invalid ROUTING_MODEL value")
-            if not isinstance(config["FORCING_DATASET"], str) or config["FORCING_DATASET"] not in ["RDRS", "ERA5"]:
-                raise ValueError("Invalid FORCING_DATASET value")
-            
-            print("\nConfiguration validation successful.")
-            return config, justification
+            return self.api.generate_parsed(prompt, system_message, self._parse_initiation)
             
         except Exception as e:
             print(f"\nError processing configuration: {str(e)}")
@@ -408,13 +476,95 @@ class Chairperson:
             
             return default_config, default_justification
 
+    @staticmethod
+    def _parse_initiation(response: str) -> Tuple[Dict[str, Any], str]:
+        """Parse and validate the initial configuration and its justification from a reply."""
+        print("\nParsing response...")
+        print(f"Response length: {len(response)}")
+        
+        # First, try to extract the code block
+        if "```python" not in response:
+            print("\nNo Python code block found. Looking for config dictionary directly...")
+            # Try to find the config dictionary directly
+            if "config = {" in response:
+                start_idx = response.find("config = {")
+                end_idx = response.find("}", start_idx) + 1
+                code_block = response[start_idx:end_idx]
+            else:
+                raise ValueError("Could not find configuration dictionary in response")
+        else:
+            # Split by code block markers
+            parts = response.split("```")
+            if len(parts) < 3:
+                print("\nIncomplete code block found. Response parts:", len(parts))
+                raise ValueError("Incomplete code block in response")
+            
+            # Get the python code block (should be the second part)
+            code_block = parts[1].replace('python', '').strip()
+        
+        print("\nExtracting configuration...")
+        print(f"Code block found: {code_block[:100]}...")  # Print first 100 chars
+        
+        # Get the config dictionary
+        match = _CONFIG_DICT_RE.search(code_block)
+        if not match:
+            raise ValueError("Configuration dictionary not found in response")
+        
+        try:
+            # Parse the dictionary literal without executing any code
+            config = ast.literal_eval(match.group(1))
+        except (ValueError, SyntaxError) as e:
+            print(f"\nError parsing code block: {str(e)}")
+            print("Code block content:")
+            print(code_block)
+            raise
+        
+        print("\nConfiguration extracted successfully.")
+        
+        # Extract justification (everything after the configuration)
+        try:
+            if "```" in response:
+                justification = response.split("```")[-1].strip()
+            else:
+                end_idx = response.find("}", response.find("config = {")) + 1
+                justification = response[end_idx:].strip()
+            
+            if not justification:
+                justification = "No detailed justification provided in the response."
+        except Exception as e:
+            print(f"\nError extracting justification: {str(e)}")
+            justification = "Error extracting justification from response."
+        
+        print("\nValidating configuration...")
+        # Validate the required keys are present
+        required_keys = {
+            "HYDROLOGICAL_MODEL", "ROUTING_MODEL", "FORCING_DATASET", 
+            "STREAM_THRESHOLD", "DOMAIN_DISCRETIZATION", "ELEVATION_BAND_SIZE", 
+            "MIN_HRU_SIZE", "POUR_POINT_COORDS", "BOUNDING_BOX_COORDS"
+        }
+        
+        missing_keys = required_keys - set(config.keys())
+        if missing_keys:
+            raise ValueError(f"Missing required configuration keys: {missing_keys}")
+            
+        # Validate the values
+        if not isinstance(config["HYDROLOGICAL_MODEL"], str) or config["HYDROLOGICAL_MODEL"] not in ["SUMMA", "FLASH"]:
+            raise ValueError("Invalid HYDROLOGICAL_MODEL value")
+        if not isinstance(config["ROUTING_MODEL"], str) or config["ROUTING_MODEL"] != "mizuroute":
+            raise ValueError("Invalid ROUTING_MODEL value")
+        if not isinstance(config["FORCING_DATASET"], str) or config["FORCING_DATASET"] not in ["RDRS", "ERA5"]:
+            raise ValueError("Invalid FORCING_DATASET value")
+        
+        print("\nConfiguration validation successful.")
+        return config, justification
+
 class INDRA:
     def __init__(self):
         bearer_token = os.environ.get('ANVIL_GPT_API_KEY')
         if not bearer_token:
             raise ValueError("ANVIL_GPT_API_KEY not found in environment variables")
 
-        self.api = AnvilGPTAPI(bearer_token)
+        self.api = AnvilGPTAPI(bearer_token, cache_path=Path(os.getcwd()) / "indra_reports" / ".indra_cache")
         self.experts = [
             HydrologistExpert(self.api),
             DataScienceExpert(self.api),
@@ -426,17 +576,26 @@ class INDRA:
     def _generate_perceptual_models(self, watershed_name: str) -> Dict[str, str]:
         print("Consulting domain experts for perceptual model generation...")
         
-        perceptual_models = {}
-        domain_experts = [expert for expert in self.experts 
-                        if isinstance(expert, (HydrologistExpert, HydrogeologyExpert, MeteorologicalExpert))]
+        domain_experts = [expert for expert in self.experts if expert.system_role is not None]
         
-        settings = {"DOMAIN_NAME": watershed_name}
+        summarized_settings = summarize_settings({"DOMAIN_NAME": watershed_name})
         
-        for expert in domain_experts:
-            print(f"\nGenerating {expert.name} perceptual model...")
-            perceptual_models[expert.name] = expert.generate_perceptual_model(settings)
-        
-        return perceptual_models
+        # Ask for all perceptual models in one round-trip; only a malformed
+        # batched reply falls back to individual requests
+        requests = [expert.perceptual_model_request(summarized_settings) for expert in domain_experts]
+        try:
+            sections = self.api.generate_text_multi(requests)
+            return {expert.name: section for expert, section in zip(domain_experts, sections)}
+        except ValueError as e:
+            print(f"Batched perceptual model generation failed ({e}); querying experts individually...")
+        
+        with ThreadPoolExecutor(max_workers=max(len(domain_experts), 1)) as executor:
+            futures = {}
+            for expert in domain_experts:
+                print(f"\nGenerating {expert.name} perceptual model...")
+                futures[expert.name] = executor.submit(expert.generate_perceptual_model, summarized_settings)
+            
+            return {name: future.result() for name, future in futures.items()}
 
     def _save_perceptual_models(self, file_path: Path, perceptual_models: Dict[str, str]):
         with open(file_path, 'w') as f:
@@ -504,15 +663,16 @@ class INDRA:
                 expert_config=config
             )
             
-            # Create/update symlink with force flag
+            # Create/update symlink atomically by renaming a fresh link over it
             active_config_path = config_path / "config_active.yaml"
-            if active_config_path.exists():
-                active_config_path.unlink()
+            tmp_link_path = active_config_path.with_suffix('.tmp')
             try:
-                os.symlink(config_file_path, active_config_path)
+                os.symlink(config_file_path, tmp_link_path)
             except FileExistsError:
-                os.remove(active_config_path)
-                os.symlink(config_file_path, active_config_path)
+                # Left over from an interrupted run
+                os.remove(tmp_link_path)
+                os.symlink(config_file_path, tmp_link_path)
+            os.replace(tmp_link_path, active_config_path)
             
             settings = config
             control_file_path = config_file_path
@@ -531,8 +691,9 @@ class INDRA:
         if not is_new_project:
             print(f"Analyzed config file: {control_file_path}")
         print("\nKey points from analysis:")
-        for i, key_point in enumerate(report['concluded_summary'].split('\n')[:10], 1):
-            print(f"{i}. {key_point}")
+        key_points = itertools.islice(io.StringIO(report['concluded_summary']), 10)
+        for i, key_point in enumerate(key_points, 1):
+            print(f"{i}. {key_point.rstrip()}")
         
         print("\nSuggestions for improvement:")
         for param, suggestion in suggestions.items():
@@ -584,39 +745,6 @@ class INDRA:
         
         return updated_settings
 
-    def _create_config_file_from_template(self, template_path: Path, output_path: Path, 
-                                    watershed_name: str, expert_config: Dict[str, Any]):
-        """Create a new configuration file from template while preserving structure and comments."""
-        if not template_path.exists():
-            raise FileNotFoundError(f"Template not found at: {template_path}")
-        
-        with open(template_path, 'r') as f:
-            template_lines = f.readlines()
-        
-        expert_config['DOMAIN_NAME'] = watershed_name
-        
-        with open(output_path, 'w') as f:
-            for line in template_lines:
-                if line.strip().startswith('#') or line.strip().startswith('### ==='):
-                    f.write(line)
-                    continue
-                    
-                if ':' in line:
-                    key = line.split(':')[0].strip()
-                    if key in expert_config:
-                        comment = line.split('#')[1].strip() if '#' in line else ''
-                        value = expert_config[key]
-                        if isinstance(value, str):
-                            value = f"'{value}'" if ' ' in value else value
-                        new_line = f"{key}: {value}"
-                        if comment:
-                            new_line += f"  # {comment}"
-                        f.write(new_line + '\n')
-                    else:
-                        f.write(line)
-                else:
-                    f.write(line)
-
     def _create_config_file_from_template(self, template_path: Path, output_path: Path, watershed_name: str, expert_config: Dict[str, Any]):
         """
         Create a new configuration file from template while preserving structure and comments.
@@ -630,45 +758,47 @@ class INDRA:
         if not template_path.exists():
             raise FileNotFoundError(f"Configuration template not found at: {template_path}")
         
-        # Read template file preserving all lines
-        with open(template_path, 'r') as f:
-            template_lines = f.readlines()
-        
         # Add watershed name to expert config
         expert_config['DOMAIN_NAME'] = watershed_name
         
-        # Process template line by line
-        with open(output_path, 'w') as f:
-            current_line = ''
+        # Stream the template straight through to the output file
+        pending = set(expert_config)
+        with open(template_path, 'r') as fin, open(output_path, 'w') as fout:
+            for line in fin:
+                rendered = self._render_template_line(line, expert_config)
+                fout.write(rendered)
+                if rendered is not line:
+                    pending.discard(rendered[:rendered.find(':')])
+                    if not pending:
+                        # Every expert setting is placed; copy the rest as is
+                        shutil.copyfileobj(fin, fout)
+                        break
+
+    @staticmethod
+    def _render_template_line(line: str, expert_config: Dict[str, Any]) -> str:
+        """Return a template line with any expert-suggested value substituted in."""
+        # Preserve comment lines and section headers
+        if _COMMENT_LINE_RE.match(line):
+            return line
             
-            for line in template_lines:
-                # Preserve comment lines and section headers
-                if line.strip().startswith('#') or line.strip().startswith('### ==='):
-                    f.write(line)
-                    continue
-                    
-                # Process configuration lines
-                if ':' in line:
-                    key = line.split(':')[0].strip()
-                    if key in expert_config:
-                        # Extract any inline comments
-                        comment = line.split('#')[1].strip() if '#' in line else ''
-                        value = expert_config[key]
-                        
-                        # Handle string values with spaces
-                        if isinstance(value, str) and ' ' in value:
-                            value = f"'{value}'"
-                        
-                        # Construct new line
-                        new_line = f"{key}: {value}"
-                        if comment:
-                            new_line += f"  # {comment}"
-                        f.write(new_line + '\n')
-                    else:
-                        # Keep original line for non-expert configs
-                        f.write(line)
-                else:
-                    f.write(line)
+        # Keep original line for non-expert configs
+        match = _CONFIG_LINE_RE.match(line)
+        if not match or match.group(1) not in expert_config:
+            return line
+        
+        # Key, value and inline comment come out of the one match
+        key, _, comment = match.groups()
+        value = expert_config[key]
+        
+        # Handle string values with spaces
+        if isinstance(value, str) and ' ' in value:
+            value = f"'{value}'"
+        
+        # Construct new line
+        new_line = f"{key}: {value}"
+        if comment:
+            new_line += f"  # {comment}"
+        return new_line + '\n'
 
     def analyze_confluence_results(self, confluence_results: Dict[str, Any]) -> str:
         """Analyze the results from a CONFLUENCE run."""
@@ -698,18 +828,49 @@ class INDRA:
 
 def summarize_settings(settings: Dict[str, Any], max_length: int = 2000) -> str:
     """Summarize the settings to a maximum length."""
-    settings_str = yaml.dump(settings)
-    if len(settings_str) <= max_length:
-        return settings_str
+    # Dump key by key (in yaml.dump's sorted order) and stop as soon as the
+    # full dump is known not to fit, rather than serializing everything first
+    chunks = []
+    total = 0
+    for key in sorted(settings):
+        chunk = yaml.dump({key: settings[key]}, Dumper=YamlDumper)
+        total += len(chunk)
+        if total > max_length:
+            break
+        chunks.append(chunk)
+    else:
+        return "".join(chunks) if chunks else yaml.dump(settings, Dumper=YamlDumper)
     
-    summarized = "Settings summary (truncated):\n"
+    chunks = ["Settings summary (truncated):\n"]
+    total = len(chunks[0])
     for key, value in settings.items():
         summary = f"{key}: {str(value)[:100]}...\n"
-        if len(summarized) + len(summary) > max_length:
+        total += len(summary)
+        if total > max_length:
             break
-        summarized += summary
+        chunks.append(summary)
     
-    return summarized
+    return "".join(chunks)
+
+@lru_cache(maxsize=128)
+def _parse_yaml_file(path: str, mtime_ns: int, size: int) -> Any:
+    """
+    Parse a YAML file; cached on path, modification time and size.
+    
+    The parse is also shared across processes through the user's parse cache.
+    """
+    data = load_parse(path, mtime_ns, size, 'yaml')
+    if data is None:
+        with open(path, 'r') as f:
+            data = yaml.load(f, Loader=YamlLoader)
+        store_parse(path, mtime_ns, size, 'yaml', data)
+    return data
+
+def load_yaml_file(file_path: Path) -> Any:
+    """Load a YAML file, reusing the previous parse if the file is unchanged."""
+    stat = os.stat(file_path)
+    # Callers may modify the result, so hand out a copy of the cached parse
+    return copy.deepcopy(_parse_yaml_file(str(Path(file_path).resolve()), stat.st_mtime_ns, stat.st_size))
 
 if __name__ == "__main__":
     try:
@@ -740,7 +901,7 @@ if __name__ == "__main__":
                 else:
                     try:
                         with open(control_file_path, 'r') as f:
-                            yaml.safe_load(f)
+                            yaml.load(f, Loader=YamlLoader)
                         print(f"\nUsing configuration file: {control_file_path}")
                         break
                     except yaml.YAMLError:
@@ -1,16 +1,86 @@
+import ast
+import calendar
+import copy
 import yaml # type: ignore
 from pathlib import Path
-from typing import Dict, Any, List, Tuple, Optional
-import anthropic # type: ignore
+from typing import Dict, Any, Callable, Deque, List, Tuple, Optional
+import mmap
 import os
+import re
 import time
+import hashlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+
+from utils.anthropic_client import get_client # type: ignore
+from utils.parse_cache import load_parse, store_parse # type: ignore
+
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper # type: ignore
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper # type: ignore
+
+# Template lines: comments/section headers, and "KEY: value  # comment" settings
+_COMMENT_LINE_RE = re.compile(r'\s*#')
+_CONFIG_LINE_RE = re.compile(r'\s*([A-Za-z_][A-Za-z0-9_]*)\s*:\s*([^#\n]*?)\s*(?:#\s*(.*?))?\s*$')
+
+# Experiment times, in the fixed "YYYY-MM-DD HH:MM" format
+_TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2})\Z')
+
+def _is_valid_timestamp(year: int, month: int, day: int, hour: int, minute: int) -> bool:
+    """Check the fields of a parsed timestamp, including days per month."""
+    return (1 <= year and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+            and hour <= 23 and minute <= 59)
+
+# Allowed values for the enumerated configuration settings
+_VALID_OPTIONS = MappingProxyType({
+    'HYDROLOGICAL_MODEL': frozenset({'SUMMA', 'FLASH', 'FUSE', 'GR', 'HYPE', 'MESH'}),
+    'ROUTING_MODEL': frozenset({'mizuRoute'}),
+    'DOMAIN_DEFINITION_METHOD': frozenset({'delineate', 'subset', 'lumped'}),
+    'DOMAIN_DISCRETIZATION': frozenset({'elevation', 'soilclass', 'landclass', 'radiation', 'GRUs', 'combined'}),
+    'FORCING_DATASET': frozenset({'ERA5', 'RDRS', 'CARRA', 'GWF-I', 'GWF-II', 'DayMet', 'NEX-GDDP'}),
+    'OPTIMIZATION_METRIC': frozenset({'RMSE', 'NSE', 'KGE', 'KGEp', 'MAE'})
+})
+
+# Topics a configuration needs, with words that show each has been discussed
+_REQUIRED_TOPIC_KEYWORDS = MappingProxyType({
+    'watershed_characteristics': ('watershed', 'basin', 'catchment', 'river', 'elevation', 'snow',
+                                  'glacier', 'soil', 'land', 'climate', 'area'),
+    'modeling_purpose': ('purpose', 'goal', 'aim', 'predict', 'forecast', 'flood', 'drought',
+                         'streamflow', 'assess', 'study', 'simulat', 'impact'),
+    'temporal_scale': ('year', 'month', 'day', 'daily', 'hour', 'period', 'season', 'decade',
+                       'time step', 'timestep'),
+    'spatial_resolution': ('resolution', 'km', 'meter', 'grid', 'hru', 'lumped', 'distributed',
+                           'band', 'discretiz', 'sub-basin', 'subbasin', 'scale')
+})
+
+# These are the settings we allow to be modified through conversation
+MODIFIABLE_SETTINGS = frozenset({
+    'HYDROLOGICAL_MODEL',
+    'ROUTING_MODEL',
+    'DOMAIN_DEFINITION_METHOD',
+    'DOMAIN_DISCRETIZATION',
+    'FORCING_DATASET',
+    'ELEVATION_BAND_SIZE',
+    'MIN_HRU_SIZE',
+    'POUR_POINT_COORDS',
+    'BOUNDING_BOX_COORDS',
+    'EXPERIMENT_TIME_START',
+    'EXPERIMENT_TIME_END',
+    'OPTIMIZATION_METRIC',
+    'NUMBER_OF_ITERATIONS',
+    'PARAMS_TO_CALIBRATE'
+})
 
 class AnthropicAPI:
     """Wrapper for Anthropic's Claude API providing controlled access to language model capabilities."""
     
     def __init__(self, api_key: str):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # Keep one connection alive across the turns of the dialogue
+        self.client = get_client(api_key)
     
     def generate_response(self, prompt: str, system_message: str, max_tokens: int = 1500) -> str:
         """Generate response using Anthropic's Claude model."""
@@ -38,6 +108,8 @@ class INDRASingleAgent:
     configurations while maintaining compatibility with the CONFLUENCE format.
     """
     
+    CONVERSATION_CACHE_MAX = 64
+    
     def __init__(self, api_key: Optional[str] = None):
         """Initialize INDRA with API key from environment or direct input."""
         if not api_key:
@@ -59,6 +131,16 @@ class INDRASingleAgent:
         4. Maintain a helpful and educational tone while ensuring technical accuracy"""
         
         self.conversation_history = []
+        # Formatted form of the last few messages, used as context for replies
+        self._recent_messages: Deque[str] = deque(maxlen=4)
+        # Running forms of the whole conversation, extended as messages arrive
+        self._conversation_text = ""
+        self._transcript = ""
+        self._conversation_digest = hashlib.blake2b(digest_size=16)
+        
+        # LLM answers keyed by a hash of the conversation they were based on
+        self._sufficiency_cache: "OrderedDict[str, bool]" = OrderedDict()
+        self._extract_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         
     def start_configuration_dialogue(self) -> Tuple[Dict[str, Any], str]:
         """
@@ -88,14 +170,14 @@ class INDRASingleAgent:
                 break
             
             # Add user input to conversation history
-            self.conversation_history.append({"role": "user", "content": user_input})
+            self._add_message("user", user_input)
             
             # Generate response considering conversation history
             response = self._generate_response(user_input)
             print("\nINDRA: " + response)
             
             # Add response to conversation history
-            self.conversation_history.append({"role": "assistant", "content": response})
+            self._add_message("assistant", response)
             
             # Check if we have enough information for configuration
             if self._has_sufficient_information():
@@ -104,20 +186,31 @@ class INDRASingleAgent:
         
         # Generate configuration and justification
         config = self._generate_config(watershed_name)
-        justification = self._generate_justification(config)
-        
-        # Save outputs
-        self._save_outputs(config, justification, watershed_name)
+        # The justification call only needs the config, so write the config
+        # file while it is being generated
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            justification_future = executor.submit(self._generate_justification, config)
+            justification = self._save_outputs(config, justification_future, watershed_name)
         
         return config, justification
     
+    def _add_message(self, role: str, content: str):
+        """Record a message in the conversation history."""
+        self.conversation_history.append({"role": role, "content": content})
+        self._recent_messages.append(f"{'User' if role == 'user' else 'INDRA'}: {content}")
+        
+        separator = " " if self._conversation_text else ""
+        self._conversation_text += separator + content
+        separator = "\n" if self._transcript else ""
+        self._transcript += f"{separator}{'User' if role == 'user' else 'Assistant'}: {content}"
+        for part in (role, content):
+            self._conversation_digest.update(part.encode('utf-8'))
+            self._conversation_digest.update(b'\0')
+    
     def _generate_response(self, user_input: str) -> str:
         """Generate contextual response based on conversation history."""
-        # Construct prompt with conversation history
-        history_text = "\n".join([
-            f"{'User' if msg['role'] == 'user' else 'INDRA'}: {msg['content']}"
-            for msg in self.conversation_history[-4:]  # Include last 4 messages for context
-        ])
+        # Construct prompt with the last 4 messages for context
+        history_text = "\n".join(self._recent_messages)
         
         prompt = f"""Conversation history:
         {history_text}
@@ -133,26 +226,40 @@ class INDRASingleAgent:
         
         return self.api.generate_response(prompt, self.system_message)
     
+    def _conversation_key(self) -> str:
+        """Stable hash of the conversation history."""
+        return self._conversation_digest.hexdigest()
+    
+    def _cache_store(self, cache: OrderedDict, key: str, value: Any):
+        cache[key] = value
+        if len(cache) > self.CONVERSATION_CACHE_MAX:
+            cache.popitem(last=False)
+    
     def _has_sufficient_information(self) -> bool:
         """Check if we have enough information to generate configuration."""
-        required_topics = [
-            'watershed_characteristics',
-            'modeling_purpose',
-            'temporal_scale',
-            'spatial_resolution'
-        ]
+        cache_key = self._conversation_key()
+        if cache_key in self._sufficiency_cache:
+            return self._sufficiency_cache[cache_key]
         
         # Analyze conversation history to check for required information
-        conversation_text = " ".join([msg["content"] for msg in self.conversation_history])
+        conversation_text = self._conversation_text
+        
+        # Only ask the model once every required topic has at least come up
+        lowered = conversation_text.lower()
+        if not all(any(keyword in lowered for keyword in keywords)
+                   for keywords in _REQUIRED_TOPIC_KEYWORDS.values()):
+            return False
         
         prompt = f"""Based on the following conversation, determine if we have sufficient information 
-        about: {', '.join(required_topics)}. Respond with only YES or NO.
+        about: {', '.join(_REQUIRED_TOPIC_KEYWORDS)}. Respond with only YES or NO.
         
         Conversation:
         {conversation_text}"""
         
         response = self.api.generate_response(prompt, self.system_message)
-        return response.strip().upper() == "YES"
+        sufficient = response.strip().upper() == "YES"
+        self._cache_store(self._sufficiency_cache, cache_key, sufficient)
+        return sufficient
     
     def _create_config_from_template(self, template_path: Path, output_path: Path, watershed_name: str, config_updates: Dict[str, Any]):
         """
@@ -168,63 +275,17 @@ class INDRASingleAgent:
             raise FileNotFoundError(f"Configuration template not found at: {template_path}")
         
         # Read template file preserving all lines
-        with open(template_path, 'r') as f:
-            template_lines = f.readlines()
+        template = get_template(template_path)
         
         # Add watershed name to updates
         config_updates['DOMAIN_NAME'] = watershed_name
         
-        # These are the settings we allow to be modified through conversation
-        MODIFIABLE_SETTINGS = {
-            'HYDROLOGICAL_MODEL',
-            'ROUTING_MODEL',
-            'DOMAIN_DEFINITION_METHOD',
-            'DOMAIN_DISCRETIZATION',
-            'FORCING_DATASET',
-            'ELEVATION_BAND_SIZE',
-            'MIN_HRU_SIZE',
-            'POUR_POINT_COORDS',
-            'BOUNDING_BOX_COORDS',
-            'EXPERIMENT_TIME_START',
-            'EXPERIMENT_TIME_END',
-            'OPTIMIZATION_METRIC',
-            'NUMBER_OF_ITERATIONS',
-            'PARAMS_TO_CALIBRATE'
-        }
+        # Only conversation-modifiable settings are substituted
+        updates = {key: value for key, value in config_updates.items() if key in MODIFIABLE_SETTINGS}
+        output_lines = render_template_lines(template, updates)
         
-        # Process template line by line
-        with open(output_path, 'w') as f:
-            for line in template_lines:
-                # Preserve comment lines and section headers
-                if line.strip().startswith('#') or line.strip().startswith('### ==='):
-                    f.write(line)
-                    continue
-                
-                # Process configuration lines
-                if ':' in line:
-                    key = line.split(':')[0].strip()
-                    if key in MODIFIABLE_SETTINGS and key in config_updates:
-                        # Preserve any inline comments
-                        comment = line.split('#')[1].strip() if '#' in line else ''
-                        value = config_updates[key]
-                        
-                        # Handle different value types
-                        if isinstance(value, bool):
-                            value_str = str(value)
-                        elif isinstance(value, str) and ' ' in value:
-                            value_str = f"'{value}'"
-                        else:
-                            value_str = str(value)
-                        
-                        new_line = f"{key}: {value_str}"
-                        if comment:
-                            new_line += f"  # {comment}"
-                        f.write(new_line + '\n')
-                    else:
-                        # Keep original line for non-modified settings
-                        f.write(line)
-                else:
-                    f.write(line)
+        with open(output_path, 'w', buffering=1 << 16) as f:
+            f.writelines(output_lines)
 
     def _extract_config_from_conversation(self) -> Dict[str, Any]:
         """
@@ -233,10 +294,11 @@ class INDRASingleAgent:
         Returns:
             Dict[str, Any]: Configuration updates based on conversation
         """
-        conversation_text = "\n".join([
-            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
-            for msg in self.conversation_history
-        ])
+        cache_key = self._conversation_key()
+        if cache_key in self._extract_cache:
+            return dict(self._extract_cache[cache_key])
+        
+        conversation_text = self._transcript
         
         prompt = f"""Based on our conversation about the watershed modeling needs, 
         determine appropriate values for the following CONFLUENCE configuration parameters.
@@ -278,43 +340,38 @@ class INDRASingleAgent:
         response = self.api.generate_response(prompt, self.system_message)
         
         try:
-            # Extract dictionary from response
-            dict_text = response.split('{')[1].split('}')[0]
-            config_dict = eval("{" + dict_text + "}")
+            # Extract dictionary from response; literal_eval never executes code
+            start = response.find('{')
+            end = response.rfind('}') + 1
+            if start == -1 or end <= start:
+                raise ValueError("No dictionary found in response")
+            config_dict = ast.literal_eval(response[start:end])
             
             # Validate the returned configuration
-            return self._validate_config_values(config_dict)
+            config_updates = self._validate_config_values(config_dict)
+            self._cache_store(self._extract_cache, cache_key, config_updates)
+            return dict(config_updates)
         except Exception as e:
             print(f"Error parsing configuration from conversation: {e}")
             return {}
 
     def _validate_config_values(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Validate configuration values against allowed options."""
-        
-        VALID_OPTIONS = {
-            'HYDROLOGICAL_MODEL': {'SUMMA', 'FLASH', 'FUSE', 'GR', 'HYPE', 'MESH'},
-            'ROUTING_MODEL': {'mizuRoute'},
-            'DOMAIN_DEFINITION_METHOD': {'delineate', 'subset', 'lumped'},
-            'DOMAIN_DISCRETIZATION': {'elevation', 'soilclass', 'landclass', 'radiation', 'GRUs', 'combined'},
-            'FORCING_DATASET': {'ERA5', 'RDRS', 'CARRA', 'GWF-I', 'GWF-II', 'DayMet', 'NEX-GDDP'},
-            'OPTIMIZATION_METRIC': {'RMSE', 'NSE', 'KGE', 'KGEp', 'MAE'}
-        }
-        
         validated_config = {}
         
         for key, value in config.items():
             # Check if parameter is in validation set
-            if key in VALID_OPTIONS:
-                if value in VALID_OPTIONS[key]:
+            if key in _VALID_OPTIONS:
+                if value in _VALID_OPTIONS[key]:
                     validated_config[key] = value
                 else:
-                    print(f"Warning: Invalid value '{value}' for {key}. Must be one of: {VALID_OPTIONS[key]}")
+                    print(f"Warning: Invalid value '{value}' for {key}. Must be one of: {', '.join(sorted(_VALID_OPTIONS[key]))}")
             # Validate time formats
             elif key in {'EXPERIMENT_TIME_START', 'EXPERIMENT_TIME_END'}:
-                try:
-                    datetime.strptime(value, '%Y-%m-%d %H:%M')
+                match = _TIMESTAMP_RE.match(value) if isinstance(value, str) else None
+                if match and _is_valid_timestamp(*map(int, match.groups())):
                     validated_config[key] = value
-                except ValueError:
+                else:
                     print(f"Warning: Invalid time format for {key}. Must be YYYY-MM-DD HH:MM")
             # Validate numeric values
             elif key in {'ELEVATION_BAND_SIZE', 'MIN_HRU_SIZE'}:
@@ -331,7 +388,7 @@ class INDRASingleAgent:
         
         return validated_config
 
-    def _save_configuration(self, watershed_name: str, config_updates: Dict[str, Any]) -> Path:
+    def _save_configuration(self, watershed_name: str, config_updates: Dict[str, Any]) -> Tuple[Path, Dict[str, Any]]:
         """
         Save configuration using the CONFLUENCE template format.
         
@@ -340,7 +397,8 @@ class INDRASingleAgent:
             config_updates (Dict[str, Any]): Configuration updates from conversation
             
         Returns:
-            Path: Path to saved configuration file
+            Tuple[Path, Dict[str, Any]]: Path to saved configuration file and the
+            complete configuration it contains
         """
         # Create output directory
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -358,71 +416,38 @@ class INDRASingleAgent:
             )
         
         # Read template and update with new values
-        with open(template_path, 'r') as f:
-            template_lines = f.readlines()
+        template = get_template(template_path)
         
         # Add watershed name to updates
         config_updates['DOMAIN_NAME'] = watershed_name
         
         # Write updated config file
-        with open(config_path, 'w') as f:
-            current_section = None
-            
-            for line in template_lines:
-                # Preserve section headers and comments
-                if line.strip().startswith('#') or line.strip().startswith('### ==='):
-                    f.write(line)
-                    continue
-                    
-                # Process configuration lines
-                if ':' in line:
-                    key = line.split(':')[0].strip()
-                    
-                    if key in config_updates:
-                        # Get value and preserve any inline comments
-                        value = config_updates[key]
-                        comment = line.split('#')[1].strip() if '#' in line else ''
-                        
-                        # Format value based on type
-                        if isinstance(value, bool):
-                            value_str = str(value)
-                        elif isinstance(value, str) and ' ' in value:
-                            value_str = f"'{value}'"
-                        else:
-                            value_str = str(value)
-                        
-                        # Write updated line preserving format
-                        new_line = f"{key}: {value_str}"
-                        if comment:
-                            new_line += f"  # {comment}"
-                        f.write(new_line + '\n')
-                    else:
-                        # Keep original line for non-updated settings
-                        f.write(line)
-                else:
-                    f.write(line)
+        output_lines = render_template_lines(template, config_updates)
+        with open(config_path, 'w', buffering=1 << 16) as f:
+            f.writelines(output_lines)
         
         print(f"\nConfiguration saved to: {config_path}")
-        return config_path
+        
+        # The written file is the template defaults with the updates applied
+        config = get_template_defaults(template_path)
+        config.update(config_updates)
+        return config_path, config
 
     def _generate_config(self, watershed_name: str) -> Dict[str, Any]:
         """Generate CONFLUENCE configuration from conversation history."""
         # Extract configuration updates from conversation
         config_updates = self._extract_config_from_conversation()
         
-        # Save configuration using template
-        config_path = self._save_configuration(watershed_name, config_updates)
-        
-        # Read and return complete configuration
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        # Save configuration using template and return the complete configuration
+        _, config = self._save_configuration(watershed_name, config_updates)
+        return config
     
     def _generate_justification(self, config: Dict[str, Any]) -> str:
         """Generate justification document for configuration choices."""
         prompt = f"""Generate a detailed justification document for the following CONFLUENCE configuration:
         
         Configuration:
-        {yaml.dump(config)}
+        {yaml.dump(config, Dumper=YamlDumper)}
         
         Include:
         1. Overview of the watershed and modeling goals
@@ -434,8 +459,16 @@ class INDRASingleAgent:
         
         return self.api.generate_response(prompt, self.system_message)
     
-    def _save_outputs(self, config: Dict[str, Any], justification: str, watershed_name: str):
-        """Save configuration and justification files."""
+    def _save_outputs(self, config: Dict[str, Any], justification_future: "Future[str]", watershed_name: str) -> str:
+        """
+        Save configuration and justification files.
+        
+        The configuration is written first; the justification is written as
+        soon as its pending generation completes.
+        
+        Returns:
+            str: The justification text
+        """
         # Create output directory
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = Path(f"indra_outputs_{watershed_name}_{timestamp}")
@@ -443,17 +476,158 @@ class INDRASingleAgent:
         
         # Save configuration
         config_file = output_dir / f"config_{watershed_name}.yaml"
-        with open(config_file, 'w') as f:
-            yaml.dump(config, f, sort_keys=False)
+        _write_bytes(config_file, yaml.dump(config, Dumper=YamlDumper, sort_keys=False).encode('utf-8'))
         
         # Save justification
+        justification = justification_future.result()
         justification_file = output_dir / f"justification_{watershed_name}.txt"
-        with open(justification_file, 'w') as f:
-            f.write(justification)
+        _write_bytes(justification_file, justification.encode('utf-8'))
         
         print(f"\nOutputs saved to: {output_dir}")
         print(f"Configuration file: {config_file}")
         print(f"Justification file: {justification_file}")
+        
+        return justification
+
+@lru_cache(maxsize=32)
+def _parse_template_defaults(path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Parse a template's default settings; cached on path, modification time and size."""
+    defaults = load_parse(path, mtime_ns, size, 'template_defaults')
+    if defaults is None:
+        with open(path, 'r') as f:
+            defaults = yaml.load(f, Loader=YamlLoader) or {}
+        store_parse(path, mtime_ns, size, 'template_defaults', defaults)
+    return defaults
+
+def get_template_defaults(template_path: Path) -> Dict[str, Any]:
+    """Load the default settings of a template, reusing the previous parse if it is unchanged."""
+    stat = os.stat(template_path)
+    # Callers may modify the result, so hand out a copy of the cached parse
+    return copy.deepcopy(_parse_template_defaults(str(Path(template_path).resolve()), stat.st_mtime_ns, stat.st_size))
+
+def _write_bytes(path: Path, data: bytes):
+    """Write already-encoded output straight to the file descriptor."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+# One parsed template line: (setting key or None, inline comment or None, raw line)
+TemplateEntry = Tuple[Optional[str], Optional[str], str]
+
+def parse_template_lines(template_lines: Tuple[str, ...]) -> Tuple[TemplateEntry, ...]:
+    """Classify template lines once so writers only need a key lookup per line."""
+    entries = []
+    for line in template_lines:
+        # Section headers and comments are copied through verbatim
+        match = None if _COMMENT_LINE_RE.match(line) else _CONFIG_LINE_RE.match(line)
+        if match:
+            key, _, comment = match.groups()
+            entries.append((key, comment, line))
+        else:
+            entries.append((None, None, line))
+    return tuple(entries)
+
+def _format_setting_line(key: str, value: Any, comment: Optional[str]) -> str:
+    """Format an updated setting, preserving any inline comment."""
+    # Format value based on type
+    if isinstance(value, str) and ' ' in value:
+        value_str = f"'{value}'"
+    else:
+        value_str = str(value)
+    
+    if comment:
+        return f"{key}: {value_str}  # {comment}\n"
+    return f"{key}: {value_str}\n"
+
+@lru_cache(maxsize=32)
+def compile_template(template: Tuple[TemplateEntry, ...]) -> Callable[[Dict[str, Any]], List[str]]:
+    """
+    Generate a renderer specialized to one parsed template.
+    
+    Runs of comment and fixed lines become single string constants and each
+    setting becomes one dict lookup, so rendering does no per-line parsing.
+    Only the template's own text is embedded, always via repr().
+    """
+    source = ["def render(config_updates):", "    output_lines = []", "    append = output_lines.append"]
+    static: List[str] = []
+    for key, comment, line in template:
+        if key is None:
+            static.append(line)
+            continue
+        if static:
+            source.append(f"    append({''.join(static)!r})")
+            static = []
+        source.append(f"    if {key!r} in config_updates:")
+        source.append(f"        append(format_line({key!r}, config_updates[{key!r}], {comment!r}))")
+        source.append("    else:")
+        source.append(f"        append({line!r})")
+    if static:
+        source.append(f"    append({''.join(static)!r})")
+    source.append("    return output_lines")
+    
+    namespace: Dict[str, Any] = {'format_line': _format_setting_line}
+    exec(compile("\n".join(source), "<config template>", "exec"), namespace)
+    return namespace['render']
+
+def render_template_lines(template: Tuple[TemplateEntry, ...], config_updates: Dict[str, Any]) -> List[str]:
+    """
+    Substitute configuration values into a parsed template, preserving comments.
+    
+    Args:
+        template (Tuple[TemplateEntry, ...]): Parsed configuration template
+        config_updates (Dict[str, Any]): Settings to write in place of the template values
+        
+    Returns:
+        List[str]: Chunks of the updated configuration file, in order
+    """
+    return compile_template(template)(config_updates)
+
+_TEMPLATE_CACHE: "OrderedDict[Path, Tuple[int, int, Tuple[TemplateEntry, ...]]]" = OrderedDict()
+_TEMPLATE_CACHE_MAX = 32
+
+def _read_template_lines(template_path: Path, size: int) -> Tuple[str, ...]:
+    # Map the file and split the raw bytes once instead of going through
+    # the buffered text layer line by line
+    with open(template_path, 'rb') as f:
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[:]
+        else:
+            data = b''
+    return tuple(line.decode('utf-8') for line in data.splitlines(keepends=True))
+
+def get_template(template_path: Path) -> Tuple[TemplateEntry, ...]:
+    """
+    Load a parsed configuration template.
+    
+    Parses are reused from memory within a process and from the user's parse
+    cache across processes; both are keyed on the template's modification
+    time and size.
+    """
+    template_path = Path(template_path).resolve()
+    stat = template_path.stat()
+    cached = _TEMPLATE_CACHE.get(template_path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        _TEMPLATE_CACHE.move_to_end(template_path)
+        return cached[2]
+    
+    cached_entries = load_parse(str(template_path), stat.st_mtime_ns, stat.st_size, 'template_lines')
+    if cached_entries is not None:
+        template = tuple((key, comment, line) for key, comment, line in cached_entries)
+    else:
+        template = parse_template_lines(_read_template_lines(template_path, stat.st_size))
+        # JSON has no tuples, so the entries are stored as lists
+        store_parse(str(template_path), stat.st_mtime_ns, stat.st_size, 'template_lines',
+                    [list(entry) for entry in template])
+    
+    _TEMPLATE_CACHE[template_path] = (stat.st_mtime_ns, stat.st_size, template)
+    if len(_TEMPLATE_CACHE) > _TEMPLATE_CACHE_MAX:
+        _TEMPLATE_CACHE.popitem(last=False)
+    return template
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,40 @@
+import threading
+from typing import Dict
+
+import anthropic # type: ignore
+import httpx # type: ignore
+
+# Connection settings shared by every Claude call in the process
+API_TIMEOUT = 60.0
+API_MAX_RETRIES = 2
+API_MAX_KEEPALIVE_CONNECTIONS = 20
+API_MAX_CONNECTIONS = 40
+
+# One client (and so one connection pool) per API key for the whole process
+_clients: Dict[str, anthropic.Anthropic] = {}
+_clients_lock = threading.Lock()
+
+def _create_http_client() -> httpx.Client:
+    """Create the HTTP client used for Claude calls, with HTTP/2 if available."""
+    limits = httpx.Limits(
+        max_keepalive_connections=API_MAX_KEEPALIVE_CONNECTIONS,
+        max_connections=API_MAX_CONNECTIONS
+    )
+    try:
+        return httpx.Client(http2=True, timeout=httpx.Timeout(API_TIMEOUT), limits=limits)
+    except ImportError:
+        # HTTP/2 support requires the optional 'h2' package
+        return httpx.Client(timeout=httpx.Timeout(API_TIMEOUT), limits=limits)
+
+def get_client(api_key: str) -> anthropic.Anthropic:
+    """Return the shared Anthropic client for an API key, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                max_retries=API_MAX_RETRIES,
+                http_client=_create_http_client()
+            )
+            _clients[api_key] = client
+        return client
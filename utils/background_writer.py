@@ -0,0 +1,48 @@
+import atexit
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+# One writer thread serves the whole process, so callers save results
+# without waiting on disk and no thread or file handle is left per caller.
+# Writes happen in the order they were submitted.
+_write_queue: "queue.Queue[Tuple[Path, bytes, bool, logging.Logger]]" = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+def _write_worker() -> None:
+    """Write queued payloads to disk."""
+    while True:
+        path, payload, append, logger = _write_queue.get()
+        try:
+            with open(path, 'ab' if append else 'wb') as f:
+                f.write(payload)
+        except OSError as e:
+            logger.error(f"Error writing {path}: {str(e)}")
+        finally:
+            _write_queue.task_done()
+
+def submit_write(path: Path, payload: bytes, logger: logging.Logger, append: bool = False) -> None:
+    """
+    Queue a payload to be written to a file by the background writer.
+
+    Args:
+        path: File to write
+        payload: Encoded file contents; serialize before submitting, so later
+            changes to the source data are not picked up
+        logger: Logger that receives write errors
+        append: Append to the file instead of replacing it
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write_worker, name="indra-writer", daemon=True)
+            _writer.start()
+            atexit.register(flush_writes)
+    _write_queue.put((path, payload, append, logger))
+
+def flush_writes() -> None:
+    """Block until every submitted write is on disk."""
+    _write_queue.join()
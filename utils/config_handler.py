@@ -1,12 +1,40 @@
-from typing import Dict, Any, Optional, List
+from typing import ClassVar, Dict, Any, Optional, List, Tuple, Union
 import logging
 from pathlib import Path
 import yaml # type: ignore
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import hashlib
+from collections import Counter
+from collections.abc import Hashable
 import json
+import os
+import re
 import shutil
 from datetime import datetime
+from functools import cached_property
 
-from utils.exceptions import ConfigError # type: ignore
+from utils.exceptions import ConfigError, ConfigLoadError # type: ignore
+
+try:
+    import aiofiles # type: ignore
+except ImportError:
+    aiofiles = None
+
+try:
+    from yaml import CSafeLoader as YamlLoader # type: ignore
+except ImportError:
+    from yaml import SafeLoader as YamlLoader # type: ignore
+
+# YAML text for recommended values, looked up by exact type; anything else
+# falls back to str()
+_YAML_FORMATTERS = {
+    str: lambda value: f"'{value}'",
+    bool: lambda value: 'true' if value else 'false',
+    int: str,
+    float: repr,
+}
 
 class ConfigValidationError(Exception):
     """Raised when configuration validation fails."""
@@ -19,17 +47,31 @@ class ConfigValidationError(Exception):
 class ConfigHandler:
     """Handles CONFLUENCE configuration management with template support."""
     
+    # Valid values for modifiable fields
+    VALID_OPTIONS = {
+        'HYDROLOGICAL_MODEL': ["SUMMA", "FLASH", "GR", "FUSE", "HYPE", "MESH"],
+        'DOMAIN_DEFINITION_METHOD': ["subset", "delineate", "lumped"],
+        'ROUTING_MODEL': ["mizuroute"],
+        'FORCING_DATASET': ["RDRS", "ERA5"],
+        'DOMAIN_DISCRETIZATION': ["elevation", "soilclass", "landclass", "radiation", "GRUs", "combined"]
+    }
+    
+    # Hashed copies of VALID_OPTIONS for membership checks
+    _VALID_OPTIONS: Dict[str, frozenset] = {
+        field: frozenset(valid_values) for field, valid_values in VALID_OPTIONS.items()
+    }
+    
+    # Template location found by the first handler, shared across instances
+    _template_path_cache: ClassVar[Optional[Path]] = None
+    
     def __init__(self, logger: logging.Logger):
         self.logger = logger
+        # Created on first backup
         self.config_backup_dir = Path("config_backups")
-        self.config_backup_dir.mkdir(exist_ok=True)
-        
-        # Load both raw and parsed template
-        self.template_content = self._load_template_content()
-        self.template_dict = yaml.safe_load(self.template_content)
+        self._backup_dir_ready = False
         
         # Fields that can be modified by expert system
-        self.modifiable_fields = {
+        self.modifiable_fields = frozenset({
             'HYDROLOGICAL_MODEL',
             'DOMAIN_DEFINITION_METHOD',
             'ROUTING_MODEL',
@@ -37,84 +79,135 @@ class ConfigHandler:
             'DOMAIN_DISCRETIZATION',
             'ELEVATION_BAND_SIZE',
             'MIN_HRU_SIZE'
-        }
+        })
+        
+        # One multi-line pattern finds every assignment create_config may replace
+        replaceable_keys = sorted(self.modifiable_fields | {'DOMAIN_NAME', 'EXPERIMENT_ID'}, key=len, reverse=True)
+        self._assign_re = re.compile(
+            r'^(?P<indent>[ \t]*)(?P<key>' + '|'.join(map(re.escape, replaceable_keys)) + r')[ \t]*:'
+            r'[^\n#]*(?:#(?P<comment>[^\n#]*)[^\n]*)?$',
+            re.MULTILINE
+        )
+
+    # The template is loaded and parsed on first use, so save-only callers
+    # never read it
+    @cached_property
+    def template_content(self) -> str:
+        return self._load_template_content()
+
+    @cached_property
+    def template_dict(self) -> Dict[str, Any]:
+        return yaml.load(self.template_content, Loader=YamlLoader)
+
+    @cached_property
+    def _format_template(self) -> Tuple[str, Dict[str, str], Dict[str, Tuple[str, str]]]:
+        return self._compile_template(self.template_content)
+
+    def _compile_template(self, template_content: str) -> Tuple[str, Dict[str, str], Dict[str, Tuple[str, str]]]:
+        """
+        Turn the template into a str.format_map template.
+        
+        Each replaceable assignment line becomes a {KEY} field; literal braces
+        in the rest of the template are escaped.
+        
+        Returns:
+            Tuple of the format template, the original line for each key, and
+            the indentation and comment suffix of each key's line
+        """
+        parts: List[str] = []
+        defaults: Dict[str, str] = {}
+        layouts: Dict[str, Tuple[str, str]] = {}
+        position = 0
+        for match in self._assign_re.finditer(template_content):
+            parts.append(template_content[position:match.start()].replace('{', '{{').replace('}', '}}'))
+            key = match['key']
+            parts.append(f"{{{key}}}")
+            comment = (match['comment'] or '').strip()
+            defaults.setdefault(key, match.group(0))
+            layouts.setdefault(key, (match['indent'], f"  # {comment}" if comment else ''))
+            position = match.end()
+        parts.append(template_content[position:].replace('{', '{{').replace('}', '}}'))
+        return ''.join(parts), defaults, layouts
 
     def _load_template_content(self) -> str:
         """Load the raw template content."""
-        possible_paths = [
-            Path(__file__).parent.parent / '0_config_files' / 'config_template.yaml',
-            Path.cwd() / '0_config_files' / 'config_template.yaml',
-            Path.cwd() / 'config_template.yaml'
-        ]
-        
-        template_path = None
-        for path in possible_paths:
-            if path.exists():
-                template_path = path
-                break
-        
-        if not template_path:
-            raise FileNotFoundError(
-                "Configuration template not found. Searched in: " + 
-                ", ".join(str(p) for p in possible_paths)
-            )
+        template_path = ConfigHandler._template_path_cache
+        if template_path is None or not template_path.is_file():
+            possible_paths = [
+                Path(__file__).parent.parent / '0_config_files' / 'config_template.yaml',
+                Path.cwd() / '0_config_files' / 'config_template.yaml',
+                Path.cwd() / 'config_template.yaml'
+            ]
+            
+            template_path = next((path for path in possible_paths if path.is_file()), None)
+            
+            if not template_path:
+                raise FileNotFoundError(
+                    "Configuration template not found. Searched in: " + 
+                    ", ".join(str(p) for p in possible_paths)
+                )
+            ConfigHandler._template_path_cache = template_path
             
         try:
-            with open(template_path, 'r') as f:
-                content = f.read()
+            # Binary read skips newline translation; decode once
+            with open(template_path, 'rb') as f:
+                content = f.read().decode('utf-8')
                 self.logger.info(f"Loaded configuration template from {template_path}")
                 return content
         except Exception as e:
             raise ConfigError(f"Error loading template: {str(e)}")
 
-    def create_config(self, expert_recommendations: Dict[str, Any], watershed_name: str) -> str:
-        """Create a new configuration based on template and expert recommendations."""
+    def load_config(self, config_path: Path) -> Dict[str, Any]:
+        """Load an existing configuration file."""
         try:
-            # Start with template content
-            config_content = self.template_content
-            
-            # Create a dictionary of replacements
+            with open(config_path, 'r') as f:
+                config = yaml.load(f, Loader=YamlLoader)
+            self.logger.info(f"Loaded configuration from {config_path}")
+            return config
+        except (OSError, yaml.YAMLError) as e:
+            raise ConfigLoadError(f"Error loading configuration: {str(e)}")
+
+    def create_config(self, expert_recommendations: Dict[str, Any], watershed_name: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Create a new configuration based on template and expert recommendations.
+        
+        Returns:
+            Tuple of the configuration file content and its parsed dictionary
+        """
+        try:
+            # Values that override the template, and their YAML text
+            overrides = {
+                'DOMAIN_NAME': watershed_name,
+                'EXPERIMENT_ID': f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            }
             replacements = {
                 'DOMAIN_NAME': f"'{watershed_name}'",
-                'EXPERIMENT_ID': f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                'EXPERIMENT_ID': overrides['EXPERIMENT_ID'],
             }
             
             # Add expert recommendations to replacements
-            for field in self.modifiable_fields:
-                if field in expert_recommendations:
-                    value = expert_recommendations[field]
-                    # Handle string values
-                    if isinstance(value, str):
-                        replacements[field] = f"'{value}'"
-                    else:
-                        replacements[field] = str(value)
-            
-            # Process template line by line
-            lines = config_content.split('\n')
-            processed_lines = []
-            
-            for line in lines:
-                if ':' in line and not line.strip().startswith('#'):
-                    key = line.split(':')[0].strip()
-                    if key in replacements:
-                        # Preserve indentation and comments
-                        indentation = line[:len(line) - len(line.lstrip())]
-                        comment = line.split('#')[1].strip() if '#' in line else ''
-                        new_line = f"{indentation}{key}: {replacements[key]}"
-                        if comment:
-                            new_line += f"  # {comment}"
-                        processed_lines.append(new_line)
-                    else:
-                        processed_lines.append(line)
-                else:
-                    processed_lines.append(line)
+            for field in self.modifiable_fields & expert_recommendations.keys():
+                value = expert_recommendations[field]
+                overrides[field] = value
+                replacements[field] = _YAML_FORMATTERS.get(type(value), str)(value)
             
-            config_content = '\n'.join(processed_lines)
+            # Fill the preprocessed template, preserving indentation and comments
+            format_template, defaults, layouts = self._format_template
+            config_content = format_template.format_map({
+                **defaults,
+                **{
+                    key: f"{layouts[key][0]}{key}: {text}{layouts[key][1]}"
+                    for key, text in replacements.items() if key in layouts
+                },
+            })
             
-            # Validate the configuration
-            self._validate_config_content(config_content)
+            # The parsed form is the template with the overrides applied, so
+            # there is no need to parse the generated YAML back
+            config_dict = copy.deepcopy(self.template_dict)
+            config_dict.update(overrides)
+            self.validate_config(config_dict)
             
-            return config_content
+            return config_content, config_dict
             
         except Exception as e:
             self.logger.error(f"Error creating configuration: {str(e)}")
@@ -123,10 +216,7 @@ class ConfigHandler:
     def validate_config(self, config: Dict[str, Any]) -> bool:
         """Validate configuration against requirements."""
         # Check all required fields from template
-        missing_fields = []
-        for field in self.template_dict.keys():
-            if field not in config:
-                missing_fields.append(field)
+        missing_fields = list(self.template_dict.keys() - config.keys())
         
         if missing_fields:
             raise ConfigValidationError(
@@ -135,20 +225,16 @@ class ConfigHandler:
             )
         
         # Validate modifiable fields have valid values
-        valid_options = {
-            'HYDROLOGICAL_MODEL': ["SUMMA", "FLASH", "GR", "FUSE", "HYPE", "MESH"],
-            'DOMAIN_DEFINITION_METHOD': ["subset", "delineate", "lumped"],
-            'ROUTING_MODEL': ["mizuroute"],
-            'FORCING_DATASET': ["RDRS", "ERA5"],
-            'DOMAIN_DISCRETIZATION': ["elevation", "soilclass", "landclass", "radiation", "GRUs", "combined"]
-        }
-        
         invalid_values = {}
-        for field, valid_values in valid_options.items():
-            if field in config and config[field] not in valid_values:
+        for field, valid_values in self._VALID_OPTIONS.items():
+            if field not in config:
+                continue
+            # Unhashable values (lists, dicts) cannot be options, so they are invalid
+            value = config[field]
+            if not isinstance(value, Hashable) or value not in valid_values:
                 invalid_values[field] = {
-                    'provided': config[field],
-                    'valid_options': valid_values
+                    'provided': value,
+                    'valid_options': self.VALID_OPTIONS[field]
                 }
         
         if invalid_values:
@@ -159,32 +245,59 @@ class ConfigHandler:
         
         return True
 
-    def _validate_config_content(self, config_content: str) -> None:
-        """Validate configuration content."""
-        try:
-            config = yaml.safe_load(config_content)
-            self.validate_config(config)
-        except yaml.YAMLError as e:
-            raise ConfigError(f"Invalid YAML format: {str(e)}")
+    def _prepare_output_path(self, config_content: Union[str, bytes], output_path: Optional[Path],
+                             config_dict: Optional[Dict[str, Any]]) -> Path:
+        """Resolve where a configuration is saved, backing up any file already there."""
+        # Parse config to get domain name for default path
+        if config_dict is None:
+            config_dict = yaml.load(config_content, Loader=YamlLoader)
+        domain_name = config_dict.get('DOMAIN_NAME', 'unnamed')
+        
+        if output_path and output_path.exists():
+            self._backup_config(output_path)
+        
+        if not output_path:
+            output_path = Path(f"0_config_files/config_{domain_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.yaml")
+        
+        # Ensure directory exists
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        return output_path
 
-    def save_config(self, config_content: str, output_path: Optional[Path] = None) -> Path:
-        """Save configuration to file with backup."""
+    def save_config(self, config_content: Union[str, bytes], output_path: Optional[Path] = None,
+                    config_dict: Optional[Dict[str, Any]] = None) -> Path:
+        """
+        Save configuration to file with backup.
+        
+        Pass the parsed configuration as config_dict when it is already known
+        (as returned by create_config) to avoid parsing config_content again.
+        Content that is already encoded is written as is.
+        """
         try:
-            # Parse config to get domain name for default path
-            config_dict = yaml.safe_load(config_content)
-            domain_name = config_dict.get('DOMAIN_NAME', 'unnamed')
+            output_path = self._prepare_output_path(config_content, output_path, config_dict)
+            data = config_content.encode('utf-8') if isinstance(config_content, str) else config_content
             
-            if output_path and output_path.exists():
-                self._backup_config(output_path)
+            with open(output_path, 'wb', buffering=0) as f:
+                f.write(data)
             
-            if not output_path:
-                output_path = Path(f"0_config_files/config_{domain_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.yaml")
+            self.logger.info(f"Configuration saved to {output_path}")
+            return output_path
             
-            # Ensure directory exists
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            self.logger.error(f"Error saving configuration: {str(e)}")
+            raise ConfigError(f"Failed to save configuration: {str(e)}")
+
+    async def save_config_async(self, config_content: Union[str, bytes], output_path: Optional[Path] = None,
+                                config_dict: Optional[Dict[str, Any]] = None) -> Path:
+        """Save configuration like save_config, without blocking the event loop on the write."""
+        try:
+            output_path = self._prepare_output_path(config_content, output_path, config_dict)
+            data = config_content.encode('utf-8') if isinstance(config_content, str) else config_content
             
-            with open(output_path, 'w') as f:
-                f.write(config_content)
+            if aiofiles is not None:
+                async with aiofiles.open(output_path, 'wb', buffering=64 * 1024) as f:
+                    await f.write(data)
+            else:
+                await asyncio.to_thread(output_path.write_bytes, data)
             
             self.logger.info(f"Configuration saved to {output_path}")
             return output_path
@@ -193,11 +306,74 @@ class ConfigHandler:
             self.logger.error(f"Error saving configuration: {str(e)}")
             raise ConfigError(f"Failed to save configuration: {str(e)}")
 
+    async def save_configs(self, items: List[Tuple[Union[str, bytes], Optional[Path]]]) -> List[Path]:
+        """
+        Save several configurations concurrently.
+        
+        Args:
+            items: (config_content, output_path) pairs; output_path may be None
+            
+        Returns:
+            Saved paths, in the order of items
+        """
+        return list(await asyncio.gather(
+            *(self.save_config_async(content, path) for content, path in items)
+        ))
+
     
-    def _backup_config(self, config_path: Path) -> None:
-        """Create backup of existing configuration file."""
+    def _backup_config(self, config_path: Path, timestamp: Optional[str] = None,
+                       tag: Optional[str] = None) -> Path:
+        """Create backup of existing configuration file, with tag added to its name if given."""
+        if not self._backup_dir_ready:
+            self.config_backup_dir.mkdir(parents=True, exist_ok=True)
+            self._backup_dir_ready = True
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{config_path.stem}_{timestamp}_{tag}" if tag else f"{config_path.stem}_{timestamp}"
+        backup_path = self.config_backup_dir / f"{name}{config_path.suffix}"
+        
+        try:
+            self._copy_in_kernel(config_path, backup_path)
+            shutil.copystat(config_path, backup_path)
+        except (OSError, AttributeError):
+            # copy_file_range is Linux-only and not supported across every filesystem
+            shutil.copy2(config_path, backup_path)
+        self.logger.info(f"Created configuration backup: {backup_path}")
+        return backup_path
+
+    @staticmethod
+    def _copy_in_kernel(source: Path, destination: Path) -> None:
+        """Copy a file with copy_file_range, without buffering it in user space."""
+        with open(source, 'rb') as src, open(destination, 'wb') as dst:
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+
+    def batch_backup_configs(self, config_paths: List[Path], max_workers: int = 8) -> List[Path]:
+        """
+        Back up several configuration files at once.
+        
+        The copies run concurrently (file copies release the GIL) and share one
+        timestamp, so a batch can be identified in the backup directory. A file
+        listed more than once is backed up once, and files with the same name
+        in different directories get a hash of their path in the backup name.
+        
+        Returns:
+            Paths of the backups, in the order of config_paths
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_path = self.config_backup_dir / f"{config_path.stem}_{timestamp}{config_path.suffix}"
+        sources = [Path(path).resolve() for path in config_paths]
+        unique_sources = list(dict.fromkeys(sources))
+        name_counts = Counter(source.name for source in unique_sources)
+        
+        def backup(source: Path) -> Path:
+            tag = None
+            if name_counts[source.name] > 1:
+                tag = hashlib.blake2b(str(source).encode('utf-8'), digest_size=4).hexdigest()
+            return self._backup_config(source, timestamp, tag)
         
-        shutil.copy2(config_path, backup_path)
-        self.logger.info(f"Created configuration backup: {backup_path}")
\ No newline at end of file
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_sources)))) as executor:
+            backups = dict(zip(unique_sources, executor.map(backup, unique_sources)))
+        return [backups[source] for source in sources]
@@ -1,11 +1,20 @@
 from typing import Optional, Dict, Any
+import sys
 import traceback
+import weakref
 from datetime import datetime
+from functools import cached_property
 
 
 class INDRAError(Exception):
     """Base exception class for all INDRA errors."""
     
+    _error_type = 'INDRAError'
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._error_type = sys.intern(cls.__name__)
+    
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         """
         Initialize INDRA error.
@@ -17,16 +26,28 @@ class INDRAError(Exception):
         self.message = message
         self.details = details or {}
         self.timestamp = datetime.now()
-        self.traceback = traceback.format_exc()
+        # Only the active exception is captured here; it is formatted on demand
+        self._tb_raw = sys.exc_info()
         super().__init__(self.message)
     
+    @property
+    def traceback(self) -> str:
+        """Formatted traceback of the exception being handled when this error was created."""
+        tb = self._tb_raw
+        return ''.join(traceback.format_exception(*tb)) if tb[0] else ''
+    
+    @cached_property
+    def timestamp_iso(self) -> str:
+        """ISO-formatted timestamp, computed on first use."""
+        return self.timestamp.isoformat()
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert error to dictionary format."""
         return {
-            'error_type': self.__class__.__name__,
+            'error_type': self._error_type,
             'message': self.message,
             'details': self.details,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': self.timestamp_iso,
             'traceback': self.traceback
         }
 
@@ -161,6 +182,11 @@ class ModelValidationError(ValidationError):
     """Error validating model configuration or output."""
     pass
 
+# Formatted output of handled INDRA errors, so an error reported at several
+# levels is only formatted once. Entries are weak, so a cached error and its
+# traceback are freed as soon as nothing else refers to them.
+_handled_errors: "weakref.WeakKeyDictionary[INDRAError, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
 def handle_exception(error: Exception) -> Dict[str, Any]:
     """
     Handle and format exception for logging and user feedback.
@@ -172,16 +198,18 @@ def handle_exception(error: Exception) -> Dict[str, Any]:
         Formatted error information dictionary
     """
     if isinstance(error, INDRAError):
-        error_info = error.to_dict()
-    else:
-        error_info = {
-            'error_type': error.__class__.__name__,
-            'message': str(error),
-            'timestamp': datetime.now().isoformat(),
-            'traceback': traceback.format_exc()
-        }
+        error_info = _handled_errors.get(error)
+        if error_info is None:
+            error_info = _handled_errors[error] = error.to_dict()
+        return dict(error_info)
     
-    return error_info
+    # Other errors are formatted each time, as the active traceback may differ
+    return {
+        'error_type': error.__class__.__name__,
+        'message': str(error),
+        'timestamp': datetime.now().isoformat(),
+        'traceback': traceback.format_exc()
+    }
 
 def raise_from_response(response: Dict[str, Any], error_class: type) -> None:
     """
@@ -1,12 +1,20 @@
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 import logging
 from pathlib import Path
+import hashlib
 import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 import anthropic # type: ignore
 
+from utils.anthropic_client import get_client # type: ignore
+from utils.background_writer import flush_writes, submit_write # type: ignore
 from utils.exceptions import PurposeParserError, ExpertAnalysisError, ConfigValidationError # type: ignore
+from utils.json_utils import json_dumps, json_loads # type: ignore
 
 @dataclass
 class Analysis:
@@ -28,13 +36,205 @@ class Consultation:
     response: str
     context: Dict[str, Any]
     
+# Static instructions shared by every expert's configuration-generation
+# request. They are sent as a cached system prompt prefix, ahead of anything
+# expert-specific, so the prefix is identical across the panel.
+CONFIG_GEN_PREFIX = """
+You must choose from these specific options:
+1. HYDROLOGICAL_MODEL: Only one of ["SUMMA", "FLASH", "GR", "FUSE", "HYPE", "MESH"]
+2. DOMAIN_DEFINITION_METHOD: Only one of ["subset", "delineate", "lumped"]
+3. ROUTING_MODEL: Only "mizuroute"
+4. FORCING_DATASET: Only one of ["RDRS", "ERA5"]
+5. DOMAIN_DISCRETIZATION: Only one of ["elevation", "soilclass", "landclass", "radiation", "GRUs", "combined"]
+
+If DOMAIN_DISCRETIZATION is "elevation", also specify:
+- ELEVATION_BAND_SIZE (in meters)
+- MIN_HRU_SIZE (in km2)
+
+Provide your response in the following JSON format only:
+{
+    "findings": {
+        "key_points": ["point1", "point2"],
+        "concerns": ["concern1", "concern2"],
+        "opportunities": ["opportunity1", "opportunity2"]
+    },
+    "recommendations": {
+        "config_settings": {
+            "HYDROLOGICAL_MODEL": "choose one valid option",
+            "DOMAIN_DEFINITION_METHOD": "choose one valid option",
+            "ROUTING_MODEL": "mizuroute",
+            "FORCING_DATASET": "choose one valid option",
+            "DOMAIN_DISCRETIZATION": "choose one valid option",
+            "ELEVATION_BAND_SIZE": integer value if applicable,
+            "MIN_HRU_SIZE": integer value if applicable
+        },
+        "immediate_actions": ["action1", "action2"],
+        "long_term_considerations": ["consideration1", "consideration2"]
+    }
+}
+"""
+
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+PROMPT_CACHING_HEADERS = {"anthropic-beta": PROMPT_CACHING_BETA}
+MESSAGE_BATCHES_BETA = "message-batches-2024-09-24"
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Fields every generated configuration must set, and the values allowed for each
+_REQUIRED_FIELDS = (
+    'HYDROLOGICAL_MODEL',
+    'DOMAIN_DEFINITION_METHOD',
+    'ROUTING_MODEL',
+    'FORCING_DATASET',
+    'DOMAIN_DISCRETIZATION'
+)
+
+_VALID_OPTIONS = {
+    'HYDROLOGICAL_MODEL': frozenset({"SUMMA", "FLASH", "GR", "FUSE", "HYPE", "MESH"}),
+    'DOMAIN_DEFINITION_METHOD': frozenset({"subset", "delineate", "lumped"}),
+    'ROUTING_MODEL': frozenset({"mizuroute"}),
+    'FORCING_DATASET': frozenset({"RDRS", "ERA5"}),
+    'DOMAIN_DISCRETIZATION': frozenset({"elevation", "soilclass", "landclass", "radiation", "GRUs", "combined"})
+}
+
+class ResponseCache:
+    """
+    Persistent exact-match cache of parsed AI responses.
+    
+    Requests are sent with temperature 0, so an identical request can reuse the
+    earlier response. Each entry is a JSON file named by the SHA-256 of the
+    request parameters.
+    """
+    
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Hash the request parameters into a cache key."""
+        payload = json_dumps(request, sort_keys=True)
+        return hashlib.sha256(payload).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a key, or None on a miss."""
+        try:
+            return json_loads((self.cache_dir / f"{key}.json").read_bytes())
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response; written atomically so readers never see a partial entry."""
+        path = self.cache_dir / f"{key}.json"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(json_dumps(response))
+        os.replace(tmp_path, path)
+    
+    def fetch_once(self, key: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fetch and cache the response for a key that missed the cache.
+        
+        Concurrent callers with the same key share a single fetch: the first
+        one runs it and the others wait for its result (or its exception).
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            # Another caller may have finished fetching just before this one
+            response = self.get(key)
+            if response is None:
+                response = fetch()
+                self.put(key, response)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+class SemanticCache:
+    """
+    Near-match cache of parsed AI responses keyed by prompt embeddings.
+    
+    A prompt reuses a cached response when the cosine similarity of their
+    embeddings exceeds the threshold. Embeddings are normalized, so one
+    matrix-vector product scores every cached prompt. Requires numpy and
+    sentence-transformers.
+    """
+    
+    def __init__(self, cache_dir: Path, threshold: float = 0.92, model_name: str = "all-MiniLM-L6-v2"):
+        # Imported here, as sentence-transformers pulls in torch and the cache is opt-in
+        try:
+            import numpy as np # type: ignore
+            from sentence_transformers import SentenceTransformer # type: ignore
+        except ImportError as e:
+            raise ImportError("SemanticCache requires numpy and sentence-transformers") from e
+        self._np = np
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.model = SentenceTransformer(model_name)
+        self._lock = threading.Lock()
+        
+        self._vectors_path = self.cache_dir / "vectors.npy"
+        self._responses_path = self.cache_dir / "responses.json"
+        try:
+            self.vectors = np.load(self._vectors_path)
+            self.responses: List[Dict[str, Any]] = json_loads(self._responses_path.read_bytes())
+        except (OSError, ValueError):
+            dimension = self.model.get_sentence_embedding_dimension()
+            self.vectors = np.empty((0, dimension), dtype=np.float32)
+            self.responses = []
+    
+    def lookup(self, prompt: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Find the closest cached response for a prompt.
+        
+        Returns:
+            Tuple of the prompt embedding and the matching response, or None
+            when no cached prompt is similar enough
+        """
+        embedding = self.model.encode(prompt, normalize_embeddings=True).astype(self._np.float32)
+        with self._lock:
+            if len(self.responses):
+                similarities = self.vectors @ embedding
+                best = int(similarities.argmax())
+                if similarities[best] > self.threshold:
+                    return embedding, self.responses[best]
+        return embedding, None
+    
+    def add(self, embedding: Any, response: Dict[str, Any]) -> None:
+        """Store a response under its prompt embedding and persist the cache."""
+        with self._lock:
+            self.vectors = self._np.vstack([self.vectors, embedding])
+            self.responses.append(response)
+            self._np.save(self._vectors_path, self.vectors)
+            with open(self._responses_path, 'wb') as f:
+                f.write(json_dumps(self.responses))
+
 class Expert:
     """Base expert class for INDRA expert system"""
     
-    def __init__(self, expertise: str, api: anthropic.Anthropic, logger: logging.Logger):
+    def __init__(self, expertise: str, api: anthropic.Anthropic, logger: logging.Logger,
+                 cache: Optional[ResponseCache] = None, semantic_cache: Optional[SemanticCache] = None):
         self.expertise = expertise
         self.api = api
         self.logger = logger
+        self.cache = cache
+        self.semantic_cache = semantic_cache
         self.context: Dict[str, Any] = {}
         self.analyses: List[Analysis] = []
         self.consultation_requests: List[Dict[str, Any]] = []
@@ -54,25 +254,28 @@ class Expert:
         
         try:
             prompt = self._generate_analysis_prompt(topic)
-            response = self._get_ai_response(prompt)
-            
-            # Create structured analysis output
-            analysis = {
-                "timestamp": datetime.now().isoformat(),
-                "expert_type": self.expertise,
-                "context": context,
-                "findings": response.get('findings', {}),
-                "recommendations": response.get('recommendations', {}),
-                "consultation_refs": []
-            }
-            
-            self.analyses.append(analysis)
-            return analysis
+            response = self._get_ai_response(prompt, self._system_prefix(topic))
+            return self._record_analysis(context, response)
             
         except Exception as e:
             self.logger.error(f"Error in expert analysis: {str(e)}")
             raise ExpertAnalysisError(f"Analysis failed: {str(e)}")
     
+    def _record_analysis(self, context: Dict[str, Any], response: Dict[str, Any],
+                         timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """Build the structured analysis for a parsed AI response and record it."""
+        analysis = {
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "expert_type": self.expertise,
+            "context": context,
+            "findings": response.get('findings', {}),
+            "recommendations": response.get('recommendations', {}),
+            "consultation_refs": []
+        }
+        
+        self.analyses.append(analysis)
+        return analysis
+    
     def request_consultation(self, question: str, required_expertise: str) -> None:
         """
         Request consultation from another expert.
@@ -102,6 +305,11 @@ class Expert:
         response = self._get_ai_response(prompt)
         return response.get('consultation', '')
     
+    @staticmethod
+    def _system_prefix(topic: str) -> Optional[str]:
+        """Cacheable system prompt prefix for a topic, if it has one."""
+        return CONFIG_GEN_PREFIX if topic == "Configuration Generation" else None
+    
     def _generate_analysis_prompt(self, topic: str) -> str:
         """Generate prompt for analysis."""
         if topic == "Configuration Generation":
@@ -109,40 +317,10 @@ class Expert:
             As an expert in {self.expertise}, generate CONFLUENCE configuration recommendations.
             
             Context:
-            {json.dumps(self.context, indent=2)}
+            {json_dumps(self.context, indent=True).decode('utf-8')}
             
-            You must choose from these specific options:
-            1. HYDROLOGICAL_MODEL: Only one of ["SUMMA", "FLASH", "GR", "FUSE", "HYPE", "MESH"]
-            2. DOMAIN_DEFINITION_METHOD: Only one of ["subset", "delineate", "lumped"]
-            3. ROUTING_MODEL: Only "mizuroute"
-            4. FORCING_DATASET: Only one of ["RDRS", "ERA5"]
-            5. DOMAIN_DISCRETIZATION: Only one of ["elevation", "soilclass", "landclass", "radiation", "GRUs", "combined"]
-            
-            If DOMAIN_DISCRETIZATION is "elevation", also specify:
-            - ELEVATION_BAND_SIZE (in meters)
-            - MIN_HRU_SIZE (in km2)
-            
-            Provide your response in the following JSON format only:
-            {{
-                "findings": {{
-                    "key_points": ["point1", "point2"],
-                    "concerns": ["concern1", "concern2"],
-                    "opportunities": ["opportunity1", "opportunity2"]
-                }},
-                "recommendations": {{
-                    "config_settings": {{
-                        "HYDROLOGICAL_MODEL": "choose one valid option",
-                        "DOMAIN_DEFINITION_METHOD": "choose one valid option",
-                        "ROUTING_MODEL": "mizuroute",
-                        "FORCING_DATASET": "choose one valid option",
-                        "DOMAIN_DISCRETIZATION": "choose one valid option",
-                        "ELEVATION_BAND_SIZE": integer value if applicable,
-                        "MIN_HRU_SIZE": integer value if applicable
-                    }},
-                    "immediate_actions": ["action1", "action2"],
-                    "long_term_considerations": ["consideration1", "consideration2"]
-                }}
-            }}
+            Choose the configuration settings and format your response as
+            specified in the system instructions.
             """
         else:
             return f"""
@@ -150,7 +328,7 @@ class Expert:
             {topic}
             
             Context:
-            {json.dumps(self.context, indent=2)}
+            {json_dumps(self.context, indent=True).decode('utf-8')}
             
             Provide your response in the following JSON format only:
             {{
@@ -174,7 +352,7 @@ class Expert:
         {question}
         
         Context:
-        {json.dumps(context, indent=2)}
+        {json_dumps(context, indent=True).decode('utf-8')}
         
         Provide your response in the following format:
         {{
@@ -182,58 +360,120 @@ class Expert:
         }}
         """
     
-    def _get_ai_response(self, prompt: str) -> Dict[str, Any]:
+    def _request_params(self, prompt: str, system_prefix: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the Messages API parameters for a prompt.
+        
+        A system_prefix is sent as a separate, cache-marked system block ahead
+        of the expert's own system prompt.
+        """
+        system: Any = (
+            f"You are a world-class expert in {self.expertise}. "
+            "Provide precise, well-reasoned responses based on established science and best practices. "
+            "Respond with valid JSON only, no other text."
+        )
+        if system_prefix:
+            system = [
+                {"type": "text", "text": system_prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": system}
+            ]
+        
+        return {
+            "model": "claude-3-sonnet-20240229",
+            "max_tokens": 2000,
+            "temperature": 0,
+            "system": system,
+            "messages": [{
+                "role": "user",
+                "content": prompt
+            }]
+        }
+    
+    @staticmethod
+    def _cache_key(params: Dict[str, Any]) -> str:
+        """Response cache key for a set of request parameters."""
+        return ResponseCache.make_key(
+            model=params["model"],
+            system=params["system"],
+            prompt=params["messages"][0]["content"],
+            max_tokens=params["max_tokens"]
+        )
+    
+    def _get_ai_response(self, prompt: str, system_prefix: Optional[str] = None) -> Dict[str, Any]:
         """Get and parse response from AI service."""
+        params = self._request_params(prompt, system_prefix)
+        
         try:
-            response = self.api.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=2000,
-                temperature=0,
-                system=(
-                    f"You are a world-class expert in {self.expertise}. "
-                    "Provide precise, well-reasoned responses based on established science and best practices. "
-                    "Respond with valid JSON only, no other text."
-                ),
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            
-            # Get and log the raw response
-            response_text = response.content[0].text
-            self.logger.debug(f"Raw AI response for {self.expertise}:\n{response_text}")
+            if self.cache is None:
+                return self._fetch_ai_response(params, system_prefix)
             
-            # Clean the response text
-            cleaned_response = response_text.strip()
-            
-            try:
-                return json.loads(cleaned_response)
-            except json.JSONDecodeError:
-                # Try to extract JSON
-                import re
-                json_pattern = r'(\{[\s\S]*\})'
-                matches = re.search(json_pattern, cleaned_response)
-                
-                if matches:
-                    json_str = matches.group(1)
-                    return json.loads(json_str)
-                    
-                raise ExpertAnalysisError(
-                    f"Could not parse AI response as JSON for {self.expertise}",
-                    details={"response": cleaned_response}
-                )
+            cache_key = self._cache_key(params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug(f"Using cached AI response for {self.expertise}")
+                return cached
+            return self.cache.fetch_once(cache_key, lambda: self._fetch_ai_response(params, system_prefix))
                 
         except Exception as e:
             self.logger.error(f"Error getting AI response for {self.expertise}: {str(e)}")
             raise ExpertAnalysisError(f"Failed to get AI response: {str(e)}")
+    
+    def _fetch_ai_response(self, params: Dict[str, Any], system_prefix: Optional[str]) -> Dict[str, Any]:
+        """Get a response from the semantic cache or, failing that, the AI service."""
+        embedding = None
+        if self.semantic_cache is not None:
+            embedding, cached = self.semantic_cache.lookup(params["messages"][0]["content"])
+            if cached is not None:
+                self.logger.debug(f"Using semantically matched AI response for {self.expertise}")
+                return cached
+        
+        response = self.api.messages.create(
+            **params,
+            extra_headers=PROMPT_CACHING_HEADERS if system_prefix else None
+        )
+        parsed = self._parse_response_text(response.content[0].text)
+        
+        if embedding is not None:
+            self.semantic_cache.add(embedding, parsed)
+        return parsed
+    
+    def _parse_response_text(self, response_text: str) -> Dict[str, Any]:
+        """Parse the raw text of an AI response as JSON."""
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Raw AI response for {self.expertise}:\n{response_text}")
+        
+        # Clean the response text
+        cleaned_response = response_text.strip()
+        
+        try:
+            return json_loads(cleaned_response)
+        except json.JSONDecodeError:
+            # Try to extract the first JSON object embedded in the text
+            start = cleaned_response.find('{')
+            if start >= 0:
+                try:
+                    return _JSON_DECODER.raw_decode(cleaned_response, start)[0]
+                except json.JSONDecodeError:
+                    pass
+                
+            raise ExpertAnalysisError(
+                f"Could not parse AI response as JSON for {self.expertise}",
+                details={"response": cleaned_response}
+            )
 
 class ExpertPanel:
     """
     Manages a panel of experts and coordinates their interactions.
     """
     
-    def __init__(self, api_key: str, model_purpose: Dict[str, Any], logger: logging.Logger):
+    # Seconds between status checks of a submitted message batch, and how long
+    # to wait for it before cancelling it and analyzing synchronously
+    BATCH_POLL_INTERVAL = 20
+    BATCH_MAX_WAIT = 3600
+    
+    def __init__(self, api_key: str, model_purpose: Dict[str, Any], logger: logging.Logger,
+                 api: Optional[anthropic.Anthropic] = None, semantic_cache: bool = False,
+                 batch_mode: bool = False):
         """
         Initialize expert panel.
         
@@ -241,14 +481,26 @@ class ExpertPanel:
             api_key: Anthropic API key
             model_purpose: Parsed modeling purpose and requirements
             logger: Logger instance
+            api: Existing Anthropic client to share (optional)
+            semantic_cache: Reuse responses to near-identical prompts across
+                experts (requires numpy and sentence-transformers)
+            batch_mode: Submit expert analyses through the Message Batches API,
+                at half the cost but with minutes of latency
         """
-        self.api = anthropic.Anthropic(api_key=api_key)
+        self.api = api or get_client(api_key)
         self.logger = logger
         self.model_purpose = model_purpose
+        self.batch_mode = batch_mode
         self.experts: Dict[str, Expert] = {}
         self.consultations: List[Consultation] = []
         self.analysis_path = Path("indra_analyses")
         self.analysis_path.mkdir(exist_ok=True)
+        self.response_cache = ResponseCache(self.analysis_path / "llm_cache")
+        self.expert_list_cache = ResponseCache(self.analysis_path / "expert_list_cache")
+        self.semantic_cache = SemanticCache(self.analysis_path / "sem_cache") if semantic_cache else None
+        
+        # Consultations are appended one record at a time
+        self.consultation_log_path = self.analysis_path / "consultations.jsonl"
         
         # Initialize core experts
         self._initialize_experts()
@@ -261,31 +513,15 @@ class ExpertPanel:
             self.experts[expertise] = Expert(
                 expertise=expertise,
                 api=self.api,
-                logger=self.logger
+                logger=self.logger,
+                cache=self.response_cache,
+                semantic_cache=self.semantic_cache
             )
             
     def _validate_generated_config(self, config: Dict[str, Any]) -> None:
         """Validate the generated configuration."""
-        # Required fields
-        required_fields = [
-            'HYDROLOGICAL_MODEL',
-            'DOMAIN_DEFINITION_METHOD',
-            'ROUTING_MODEL',
-            'FORCING_DATASET',
-            'DOMAIN_DISCRETIZATION'
-        ]
-        
-        # Valid options
-        valid_options = {
-            'HYDROLOGICAL_MODEL': ["SUMMA", "FLASH", "GR", "FUSE", "HYPE", "MESH"],
-            'DOMAIN_DEFINITION_METHOD': ["subset", "delineate", "lumped"],
-            'ROUTING_MODEL': ["mizuroute"],
-            'FORCING_DATASET': ["RDRS", "ERA5"],
-            'DOMAIN_DISCRETIZATION': ["elevation", "soilclass", "landclass", "radiation", "GRUs", "combined"]
-        }
-        
         # Check required fields
-        missing_fields = [field for field in required_fields if field not in config]
+        missing_fields = [field for field in _REQUIRED_FIELDS if field not in config]
         if missing_fields:
             raise ConfigValidationError(
                 "Generated configuration missing required fields",
@@ -294,11 +530,11 @@ class ExpertPanel:
         
         # Validate options
         invalid_values = {}
-        for field, valid_values in valid_options.items():
+        for field, valid_values in _VALID_OPTIONS.items():
             if field in config and config[field] not in valid_values:
                 invalid_values[field] = {
                     'provided': config[field],
-                    'valid_options': valid_values
+                    'valid_options': sorted(valid_values)
                 }
         
         if invalid_values:
@@ -320,11 +556,18 @@ class ExpertPanel:
     
     def _determine_required_experts(self) -> List[str]:
         """Determine required experts based on model purpose."""
+        # The expert list depends only on the purpose, so it is cached by the
+        # purpose itself and a repeat run skips building the prompt as well
+        cache_key = ResponseCache.make_key(model="claude-3-sonnet-20240229", model_purpose=self.model_purpose)
+        cached = self.expert_list_cache.get(cache_key)
+        if cached is not None:
+            return cached['required_experts']
+        
         prompt = f"""
         Based on the following modeling purpose and requirements,
         determine which types of experts are needed (maximum 10):
         
-        {json.dumps(self.model_purpose, indent=2)}
+        {json_dumps(self.model_purpose, indent=True).decode('utf-8')}
         
         Response format:
         {{"required_experts": ["expertise1", "expertise2", ...]}}
@@ -337,8 +580,10 @@ class ExpertPanel:
             messages=[{"role": "user", "content": prompt}]
         )
         
-        experts_list = json.loads(response.content[0].text).get('required_experts', [])
-        return experts_list[:10]  # Ensure maximum of 10 experts
+        experts_list = json_loads(response.content[0].text).get('required_experts', [])
+        experts_list = experts_list[:10]  # Ensure maximum of 10 experts
+        self.expert_list_cache.put(cache_key, {'required_experts': experts_list})
+        return experts_list
     
     def analyze_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -353,12 +598,11 @@ class ExpertPanel:
         results = {}
         context = {'config': config, 'purpose': self.model_purpose}
         
-        for expertise, expert in self.experts.items():
-            analysis = expert.analyze("Configuration Analysis", context)
-            results[expertise] = asdict(analysis)
+        for expertise, analysis in self._analyze_in_parallel("Configuration Analysis", context).items():
+            results[expertise] = analysis
             
             # Handle any consultation requests
-            self._process_consultation_requests(expert)
+            self._process_consultation_requests(self.experts[expertise])
         
         self._save_analysis_results(results)
         return results
@@ -377,11 +621,13 @@ class ExpertPanel:
         config = {}
         
         try:
+            # Experts are consulted concurrently; contributions are merged in
+            # panel order so later experts still take precedence
+            analyses = self._analyze_in_parallel("Configuration Generation", context)
+            
             # Each expert contributes to their relevant config sections
-            for expertise, expert in self.experts.items():
-                self.logger.debug(f"Getting configuration input from {expertise}")
-                
-                analysis = expert.analyze("Configuration Generation", context)
+            for expertise, analysis in analyses.items():
+                expert = self.experts[expertise]
                 
                 # Ensure we get a dictionary of config settings
                 if isinstance(analysis, dict) and 'recommendations' in analysis:
@@ -391,7 +637,8 @@ class ExpertPanel:
                     continue
                     
                 if expert_config:
-                    self.logger.debug(f"Config contribution from {expertise}: {json.dumps(expert_config, indent=2)}")
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug(f"Config contribution from {expertise}: {json_dumps(expert_config, indent=True).decode('utf-8')}")
                     config.update(expert_config)
                 
                 # Handle any consultation requests
@@ -409,8 +656,97 @@ class ExpertPanel:
             self.logger.error(f"Error generating configuration: {str(e)}")
             raise PurposeParserError(f"Failed to generate configuration: {str(e)}")
     
+    def _analyze_in_parallel(self, topic: str, context: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every expert's analysis of a topic concurrently.
+        
+        Returns:
+            Analyses keyed by expertise, in panel order
+        """
+        if not self.experts:
+            return {}
+        if self.batch_mode:
+            return self._analyze_in_batch(topic, context)
+        return self._analyze_in_threads(topic, context)
+    
+    def _analyze_in_threads(self, topic: str, context: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Run every expert's analysis of a topic on its own thread."""
+        with ThreadPoolExecutor(max_workers=len(self.experts)) as executor:
+            futures = {}
+            for expertise, expert in self.experts.items():
+                self.logger.debug(f"Getting {topic.lower()} input from {expertise}")
+                futures[expertise] = executor.submit(expert.analyze, topic, context)
+            return {expertise: future.result() for expertise, future in futures.items()}
+    
+    def _analyze_in_batch(self, topic: str, context: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run every expert's analysis of a topic as one message batch.
+        
+        Cached responses are used directly; only the misses are submitted, and
+        the batch is polled until it has ended. A batch still running after
+        BATCH_MAX_WAIT seconds is cancelled and the topic analyzed synchronously.
+        
+        Returns:
+            Analyses keyed by expertise, in panel order
+        """
+        responses: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        system_prefix = Expert._system_prefix(topic)
+        
+        for index, (expertise, expert) in enumerate(self.experts.items()):
+            expert.context.update(context)
+            params = expert._request_params(expert._generate_analysis_prompt(topic), system_prefix)
+            cached = self.response_cache.get(Expert._cache_key(params))
+            if cached is not None:
+                responses[expertise] = cached
+            else:
+                # Custom ids may only contain letters, digits, '_' and '-'
+                pending[f"expert-{index}"] = (expertise, params)
+        
+        if pending:
+            batches = self.api.beta.messages.batches
+            batch = batches.create(
+                requests=[
+                    {"custom_id": custom_id, "params": params}
+                    for custom_id, (_, params) in pending.items()
+                ],
+                betas=[MESSAGE_BATCHES_BETA, PROMPT_CACHING_BETA] if system_prefix else [MESSAGE_BATCHES_BETA]
+            )
+            self.logger.info(f"Submitted message batch {batch.id} for {len(pending)} experts")
+            
+            deadline = time.monotonic() + self.BATCH_MAX_WAIT
+            while batch.processing_status != "ended":
+                if time.monotonic() >= deadline:
+                    self.logger.warning(
+                        f"Message batch {batch.id} did not finish within {self.BATCH_MAX_WAIT}s; "
+                        f"cancelling it and analyzing synchronously"
+                    )
+                    batches.cancel(batch.id)
+                    return self._analyze_in_threads(topic, context)
+                time.sleep(self.BATCH_POLL_INTERVAL)
+                batch = batches.retrieve(batch.id)
+            
+            for entry in batches.results(batch.id):
+                expertise, params = pending[entry.custom_id]
+                if entry.result.type != "succeeded":
+                    raise ExpertAnalysisError(
+                        f"Batch analysis failed for {expertise}",
+                        details={"result_type": entry.result.type}
+                    )
+                response = self.experts[expertise]._parse_response_text(entry.result.message.content[0].text)
+                self.response_cache.put(Expert._cache_key(params), response)
+                responses[expertise] = response
+        
+        timestamp = datetime.now().isoformat()
+        return {
+            expertise: expert._record_analysis(context, responses[expertise], timestamp)
+            for expertise, expert in self.experts.items()
+        }
+    
     def _process_consultation_requests(self, requesting_expert: Expert) -> None:
         """Process any pending consultation requests from an expert."""
+        # Consultations processed together share one timestamp
+        timestamp = datetime.now().isoformat()
         for request in requesting_expert.consultation_requests:
             if request['required_expertise'] in self.experts:
                 consulted_expert = self.experts[request['required_expertise']]
@@ -421,7 +757,7 @@ class ExpertPanel:
                 )
                 
                 consultation = Consultation(
-                    timestamp=datetime.now().isoformat(),
+                    timestamp=timestamp,
                     requesting_expert=requesting_expert.expertise,
                     consulted_expert=consulted_expert.expertise,
                     question=request['question'],
@@ -430,21 +766,19 @@ class ExpertPanel:
                 )
                 
                 self.consultations.append(consultation)
+                submit_write(self.consultation_log_path, json_dumps(consultation) + b"\n", self.logger, append=True)
                 
         # Clear processed requests
         requesting_expert.consultation_requests.clear()
     
     def _save_analysis_results(self, results: Dict[str, Any]) -> None:
-        """Save analysis results and consultations to file."""
+        """Queue analysis results to be saved to file."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Save analyses
+        # Serialize now so later changes to results are not picked up
         analysis_file = self.analysis_path / f"analysis_{timestamp}.json"
-        with open(analysis_file, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        # Save consultations
-        if self.consultations:
-            consultation_file = self.analysis_path / f"consultations_{timestamp}.json"
-            with open(consultation_file, 'w') as f:
-                json.dump([asdict(c) for c in self.consultations], f, indent=2)
\ No newline at end of file
+        submit_write(analysis_file, json_dumps(results, indent=True), self.logger)
+    
+    def flush(self) -> None:
+        """Block until all queued analysis results and consultations are on disk."""
+        flush_writes()
@@ -0,0 +1,35 @@
+import json
+from dataclasses import fields, is_dataclass
+from typing import Any, Dict
+
+# JSON helpers shared across INDRA: orjson when it is installed, otherwise the
+# standard library. json_dumps returns UTF-8 bytes either way.
+try:
+    import orjson # type: ignore
+
+    # orjson serializes dataclasses natively, without the deep copy asdict makes
+    def json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+
+    json_loads = orjson.loads
+except ImportError:
+    def _dataclass_fields(obj: Any) -> Dict[str, Any]:
+        # Shallow field mapping; the encoder handles nested values itself
+        if is_dataclass(obj) and not isinstance(obj, type):
+            return {field.name: getattr(obj, field.name) for field in fields(obj)}
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+        if indent:
+            text = json.dumps(obj, indent=2, sort_keys=sort_keys, ensure_ascii=False, default=_dataclass_fields)
+        else:
+            text = json.dumps(obj, sort_keys=sort_keys, separators=(',', ':'), ensure_ascii=False,
+                              default=_dataclass_fields)
+        return text.encode('utf-8')
+
+    json_loads = json.loads
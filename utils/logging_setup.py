@@ -1,10 +1,12 @@
+import atexit
 import logging
+import queue
 import sys
 from pathlib import Path
-from datetime import datetime
+from time import perf_counter_ns
 from typing import Optional
 import json
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 class INDRAFormatter(logging.Formatter):
     """Custom formatter for INDRA logs with color support for console output"""
@@ -34,24 +36,13 @@ class INDRAFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         """Format log record with optional color coding."""
-        # Save original values
-        orig_msg = record.msg
-        orig_levelname = record.levelname
+        formatted = super().format(record)
         
-        # Add colors for console output
+        # Color the whole console line at once rather than patching the record
         if self.is_console:
-            color = self.COLORS.get(record.levelname, '')
+            color = self.COLORS.get(record.levelname)
             if color:
-                record.levelname = f"{color}{record.levelname}{self.RESET}"
-                if isinstance(record.msg, str):
-                    record.msg = f"{color}{record.msg}{self.RESET}"
-        
-        # Format the message
-        formatted = super().format(record)
-        
-        # Restore original values
-        record.msg = orig_msg
-        record.levelname = orig_levelname
+                return color + formatted + self.RESET
         
         return formatted
 
@@ -85,6 +76,10 @@ def setup_logging(
     
     # Remove any existing handlers
     logger.handlers.clear()
+    previous_listener = getattr(logger, '_listener', None)
+    if previous_listener is not None:
+        previous_listener.stop()
+        atexit.unregister(previous_listener.stop)
     
     # Set up log directory
     if log_dir is None:
@@ -95,7 +90,6 @@ def setup_logging(
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(console_level)
     console_handler.setFormatter(INDRAFormatter(is_console=True))
-    logger.addHandler(console_handler)
     
     # Create main log file handler (size-based rotation)
     main_log_file = log_dir / f"{name}.log"
@@ -106,19 +100,6 @@ def setup_logging(
     )
     file_handler.setLevel(file_level)
     file_handler.setFormatter(INDRAFormatter(is_console=False))
-    logger.addHandler(file_handler)
-    
-    # Create daily log file handler
-    daily_log_file = log_dir / f"{name}_daily.log"
-    daily_handler = TimedRotatingFileHandler(
-        daily_log_file,
-        when='midnight',
-        interval=1,
-        backupCount=30  # Keep 30 days of logs
-    )
-    daily_handler.setLevel(file_level)
-    daily_handler.setFormatter(INDRAFormatter(is_console=False))
-    logger.addHandler(daily_handler)
     
     # Create error log handler (separate file for errors and above)
     error_log_file = log_dir / f"{name}_errors.log"
@@ -129,14 +110,27 @@ def setup_logging(
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(INDRAFormatter(is_console=False))
-    logger.addHandler(error_handler)
+    
+    # Handlers run on a background listener thread; logging calls only enqueue
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+    listener = QueueListener(
+        log_queue,
+        console_handler,
+        file_handler,
+        error_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    logger._listener = listener  # type: ignore[attr-defined]
+    atexit.register(listener.stop)
     
     # Capture warnings from Python's warning system
     if capture_warnings:
         logging.captureWarnings(True)
         warnings_logger = logging.getLogger('py.warnings')
-        warnings_logger.addHandler(console_handler)
-        warnings_logger.addHandler(file_handler)
+        warnings_logger.addHandler(QueueHandler(log_queue))
     
     # Log initial message with configuration details
     config = {
@@ -198,16 +192,16 @@ def log_execution_time(logger: logging.Logger):
     """
     def decorator(func):
         def wrapper(*args, **kwargs):
-            start_time = datetime.now()
+            start = perf_counter_ns()
             try:
                 result = func(*args, **kwargs)
-                elapsed_time = datetime.now() - start_time
-                logger.info(f"Function {func.__name__} executed in {elapsed_time}")
+                elapsed_ms = (perf_counter_ns() - start) / 1e6
+                logger.info(f"Function {func.__name__} executed in {elapsed_ms:.3f} ms")
                 return result
             except Exception as e:
-                elapsed_time = datetime.now() - start_time
+                elapsed_ms = (perf_counter_ns() - start) / 1e6
                 logger.error(
-                    f"Function {func.__name__} failed after {elapsed_time}: {str(e)}",
+                    f"Function {func.__name__} failed after {elapsed_ms:.3f} ms: {str(e)}",
                     exc_info=True
                 )
                 raise
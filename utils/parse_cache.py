@@ -0,0 +1,87 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+from utils.json_utils import json_dumps, json_loads # type: ignore
+
+# Parsed configuration files and templates, shared across processes. Entries
+# are plain JSON data in a directory only the current user can write to, so a
+# cache entry can never run code when it is loaded.
+PARSE_CACHE_DIR = Path.home() / '.cache' / 'indra' / 'parsed'
+
+def _cache_dir() -> Optional[Path]:
+    """Create the cache directory if needed; None if it is not private to this user."""
+    try:
+        PARSE_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        stat = PARSE_CACHE_DIR.stat()
+    except OSError:
+        return None
+    if hasattr(os, 'getuid') and (stat.st_uid != os.getuid() or stat.st_mode & 0o022):
+        return None
+    return PARSE_CACHE_DIR
+
+def _cache_file(directory: Path, path: str, mtime_ns: int, size: int, kind: str) -> Path:
+    # A changed file hashes to a new entry, so stale entries are never read
+    key = hashlib.blake2b(f"{path}:{mtime_ns}:{size}".encode('utf-8'), digest_size=8).hexdigest()
+    return directory / f"{kind}_{key}.json"
+
+def load_parse(path: str, mtime_ns: int, size: int, kind: str) -> Any:
+    """
+    Load the cached parse of a file.
+
+    Args:
+        path: Resolved path of the parsed file
+        mtime_ns: Modification time of the file, in nanoseconds
+        size: Size of the file in bytes
+        kind: Kind of parse, so one file can have several cached parses
+
+    Returns:
+        The cached data, or None if there is no usable entry
+    """
+    directory = _cache_dir()
+    if directory is None:
+        return None
+    cache_file = _cache_file(directory, path, mtime_ns, size, kind)
+    try:
+        with open(cache_file, 'rb') as f:
+            if hasattr(os, 'getuid') and os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def store_parse(path: str, mtime_ns: int, size: int, kind: str, data: Any) -> None:
+    """
+    Cache the parse of a file.
+
+    Data that does not survive a JSON round trip unchanged (e.g. dates,
+    tuples or non-string keys) is not cached. Errors are ignored; they only
+    mean the file is parsed again next time.
+    """
+    directory = _cache_dir()
+    if directory is None:
+        return
+    try:
+        payload = json_dumps(data)
+        if json_loads(payload) != data:
+            return
+    except (TypeError, ValueError):
+        return
+
+    # mkstemp creates a new file exclusively, so an existing path (or symlink)
+    # is never written through
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, _cache_file(directory, path, mtime_ns, size, kind))
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
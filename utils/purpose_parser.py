@@ -1,12 +1,142 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import logging
-from dataclasses import dataclass, asdict
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+import hashlib
 import json
 import anthropic # type: ignore
 from pathlib import Path
+from types import MappingProxyType
 from datetime import datetime
 
+from utils.anthropic_client import get_client # type: ignore
+from utils.background_writer import flush_writes, submit_write # type: ignore
 from utils.exceptions import PurposeParserError # type: ignore
+from utils.expert_system import SemanticCache # type: ignore
+from utils.json_utils import json_dumps, json_loads # type: ignore
+
+SYSTEM_PROMPT = (
+    "You are an expert in hydrological modeling requirements analysis. "
+    "Extract and structure modeling requirements precisely and comprehensively. "
+    "Always record your answer with the provided tool."
+)
+
+# Prompts are split into static instructions, sent first and marked for
+# Anthropic prompt caching, and the request-specific text that follows them
+PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
+# Answers are returned as the input of a forced tool call, so the response is
+# already structured and never needs to be extracted from prose
+_SCALE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string"},
+        "resolution": {"type": "string"}
+    },
+    "required": ["type", "resolution"]
+}
+
+_STRING_LIST_SCHEMA = {"type": "array", "items": {"type": "string"}}
+
+_REQUIREMENTS_PROPERTIES = {
+    "temporal_scale": dict(_SCALE_SCHEMA, description="Temporal type (continuous/event-based/etc) and resolution"),
+    "spatial_scale": dict(_SCALE_SCHEMA, description="Spatial type (distributed/lumped/semi-distributed) and resolution"),
+    "key_processes": dict(_STRING_LIST_SCHEMA, description="Key hydrological processes to model"),
+    "required_outputs": dict(_STRING_LIST_SCHEMA, description="Required model outputs and variables"),
+    "analysis_requirements": dict(_STRING_LIST_SCHEMA, description="Analysis requirements, e.g. uncertainty or sensitivity"),
+    "constraints": {
+        "type": "object",
+        "description": "Constraints or limitations",
+        "properties": {
+            "computational": {"type": "string"},
+            "data": {"type": "string"}
+        }
+    },
+    "specific_concerns": dict(_STRING_LIST_SCHEMA, description="Specific concerns or focus areas")
+}
+
+REQUIREMENTS_TOOL = {
+    "name": "emit_requirements",
+    "description": "Record the structured modeling requirements.",
+    "input_schema": {
+        "type": "object",
+        "properties": _REQUIREMENTS_PROPERTIES,
+        "required": list(_REQUIREMENTS_PROPERTIES)
+    }
+}
+
+REQUIREMENTS_WITH_WATERSHED_TOOL = {
+    "name": "emit_requirements",
+    "description": "Record the structured modeling requirements and the main watershed name.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "watershed": {
+                "type": "string",
+                "description": "Main watershed or river name as a single word or phrase"
+            },
+            **_REQUIREMENTS_PROPERTIES
+        },
+        "required": ["watershed", *_REQUIREMENTS_PROPERTIES]
+    }
+}
+
+_WATERSHED_ASPECT = "8. The main watershed or river name\n"
+
+_EXTRACT_INSTRUCTIONS = """
+Analyze the modeling purpose given after these instructions and extract key requirements.
+
+Extract and categorize the following aspects:
+1. Temporal scale and resolution requirements
+2. Spatial scale and resolution needs
+3. Key hydrological processes that need to be modeled
+4. Required model outputs and variables
+5. Analysis requirements (e.g., uncertainty, sensitivity)
+6. Any constraints or limitations
+7. Specific concerns or focus areas
+{watershed_aspect}
+Record the requirements with the emit_requirements tool.
+"""
+
+EXTRACT_INSTRUCTIONS = _EXTRACT_INSTRUCTIONS.format(watershed_aspect='')
+EXTRACT_WITH_WATERSHED_INSTRUCTIONS = _EXTRACT_INSTRUCTIONS.format(watershed_aspect=_WATERSHED_ASPECT)
+
+_EXTRACT_AND_ENHANCE_INSTRUCTIONS = """
+Analyze the modeling purpose given after these instructions and produce
+detailed modeling requirements. Work in two steps:
+
+1. Extract the requirements the purpose states: temporal scale and resolution,
+   spatial scale and resolution, key hydrological processes, required model
+   outputs, analysis requirements (e.g., uncertainty, sensitivity), constraints
+   or limitations, and specific concerns or focus areas.{watershed_aspect}
+2. Enhance them by identifying implicit needs not directly stated, additional
+   relevant processes to consider, potential challenges or special
+   considerations, and additional outputs that might be valuable.
+
+Record the final enhanced requirements with the emit_requirements tool.
+"""
+
+EXTRACT_AND_ENHANCE_INSTRUCTIONS = _EXTRACT_AND_ENHANCE_INSTRUCTIONS.format(watershed_aspect='')
+EXTRACT_AND_ENHANCE_WITH_WATERSHED_INSTRUCTIONS = _EXTRACT_AND_ENHANCE_INSTRUCTIONS.format(
+    watershed_aspect="\n   Also identify the main watershed or river name."
+)
+
+ENHANCE_INSTRUCTIONS = """
+You will be given basic modeling requirements and the original purpose
+description they were extracted from.
+
+Enhance the requirements by:
+1. Identifying any implicit needs not directly stated
+2. Suggesting additional relevant processes to consider
+3. Identifying potential challenges or special considerations
+4. Recommending additional outputs that might be valuable
+
+Record the enhanced requirements with the emit_requirements tool, keeping the
+structure of the input.
+"""
 
 @dataclass
 class ModelingRequirements:
@@ -21,7 +151,8 @@ class ModelingRequirements:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert requirements to dictionary format."""
-        return asdict(self)
+        # Shallow copy; fields hold no nested dataclasses for asdict to convert
+        return dict(self.__dict__)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ModelingRequirements':
@@ -31,12 +162,60 @@ class ModelingRequirements:
 class PurposeParser:
     """Parses natural language descriptions of modeling purposes into structured requirements."""
     
-    def __init__(self, api_key: str, logger: logging.Logger):
-        self.api = anthropic.Anthropic(api_key=api_key)
+    # Times parse_many retries a purpose whose request was rate limited
+    RATE_LIMIT_RETRIES = 5
+    
+    # Template for requirements structure, shared by all parsers and read-only
+    _TEMPLATE = MappingProxyType({
+        "temporal_scale": MappingProxyType({
+            "type": "",
+            "resolution": ""
+        }),
+        "spatial_scale": MappingProxyType({
+            "type": "",
+            "resolution": ""
+        }),
+        "key_processes": (),
+        "required_outputs": (),
+        "analysis_requirements": (),
+        "constraints": MappingProxyType({
+            "computational": "",
+            "data": ""
+        }),
+        "specific_concerns": ()
+    })
+    
+    def __init__(self, api_key: str, logger: logging.Logger, api: Optional[anthropic.Anthropic] = None,
+                 enable_cache: bool = True, legacy_two_step: bool = False, semantic_cache: bool = False,
+                 enhancement_threshold: Optional[int] = 3):
+        self.api = api or get_client(api_key)
         self.logger = logger
-        self.requirements_template = self._load_requirements_template()
+        # Extract and enhance in separate requests instead of one combined request
+        self.legacy_two_step = legacy_two_step
+        # With legacy_two_step, basic requirements that fill every field and list
+        # at least this many processes and outputs skip enhancement; None
+        # always enhances
+        self.enhancement_threshold = enhancement_threshold
+        self.requirements_template = self._TEMPLATE
         self.purpose_dir = Path("parsed_purposes")
         self.purpose_dir.mkdir(exist_ok=True)
+        
+        # Responses are requested at temperature 0, so identical prompts can
+        # reuse an earlier response stored on disk
+        self.enable_cache = enable_cache
+        self.cache_dir = self.purpose_dir / "_ai_cache"
+        if enable_cache:
+            self.cache_dir.mkdir(exist_ok=True)
+        # Differently worded descriptions of the same purpose can reuse earlier
+        # requirements; needs numpy and sentence-transformers
+        self.semantic_cache = SemanticCache(self.purpose_dir / "_semantic_cache") if semantic_cache else None
+        
+        # Digests of saved purposes, so identical results are only saved once
+        self._saved_digests = {
+            path.stem.rsplit('_', 1)[1] for path in self.purpose_dir.glob("purpose_analysis_*_*.json")
+            if len(path.stem.rsplit('_', 1)[1]) == 16
+        }
+        self._save_lock = threading.Lock()
     
     def parse(self, purpose_text: str) -> Dict[str, Any]:
         """
@@ -51,9 +230,182 @@ class PurposeParser:
         self.logger.info("Parsing modeling purpose")
         self.logger.debug(f"Raw purpose text: {purpose_text}")
         
-        # Extract and enhance requirements
-        basic_requirements = self._extract_basic_requirements(purpose_text)
-        detailed_requirements = self._enhance_requirements(purpose_text, basic_requirements)
+        embedding, cached = self._semantic_lookup(purpose_text)
+        if cached is not None:
+            return cached
+        
+        requirements = self._requirements_from_text(purpose_text)
+        result = self._complete_requirements(purpose_text, requirements)
+        if embedding is not None:
+            self.semantic_cache.add(embedding, result)
+        return result
+    
+    async def parse_async(self, purpose_text: str) -> Dict[str, Any]:
+        """
+        Parse natural language purpose into structured requirements without
+        blocking the event loop.
+        
+        With legacy_two_step, the extraction request and an enhancement request
+        from the purpose text alone run concurrently and are merged, rather
+        than the enhancement waiting on the extraction.
+        
+        Args:
+            purpose_text: Natural language description of modeling purpose
+            
+        Returns:
+            Dictionary containing structured requirements
+        """
+        self.logger.info("Parsing modeling purpose")
+        self.logger.debug(f"Raw purpose text: {purpose_text}")
+        
+        embedding, cached = await asyncio.to_thread(self._semantic_lookup, purpose_text)
+        if cached is not None:
+            return cached
+        
+        if self.legacy_two_step:
+            basic_requirements, enhanced_requirements = await asyncio.gather(
+                asyncio.to_thread(self._extract_basic_requirements, purpose_text),
+                asyncio.to_thread(self._extract_and_enhance, purpose_text)
+            )
+            requirements = self._merge_requirements(basic_requirements, enhanced_requirements)
+        else:
+            requirements = await asyncio.to_thread(self._extract_and_enhance, purpose_text)
+        
+        result = await asyncio.to_thread(self._complete_requirements, purpose_text, requirements)
+        if embedding is not None:
+            await asyncio.to_thread(self.semantic_cache.add, embedding, result)
+        return result
+    
+    async def parse_many(self, texts: List[str], concurrency: int = 8) -> List[Dict[str, Any]]:
+        """
+        Parse several purposes, with up to concurrency requests in flight.
+        
+        A purpose whose request is rate limited is retried after the delay
+        the API asks for.
+        
+        Args:
+            texts: Natural language descriptions of modeling purposes
+            concurrency: Maximum number of purposes parsed at once
+            
+        Returns:
+            Structured requirements for each purpose, in the order given
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def parse_one(purpose_text: str) -> Dict[str, Any]:
+            async with semaphore:
+                for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+                    try:
+                        return await self.parse_async(purpose_text)
+                    except PurposeParserError as e:
+                        rate_limit = e.__cause__
+                        if not isinstance(rate_limit, anthropic.RateLimitError) or attempt == self.RATE_LIMIT_RETRIES:
+                            raise
+                        try:
+                            delay = float(rate_limit.response.headers.get("retry-after", 1))
+                        except (AttributeError, ValueError):
+                            delay = 1.0
+                        self.logger.warning(f"Rate limited, retrying purpose in {delay:.0f}s")
+                        await asyncio.sleep(delay)
+        
+        # Each distinct purpose is parsed once, so duplicates do not race on
+        # the same cache entry
+        unique_texts = list(dict.fromkeys(texts))
+        results = await asyncio.gather(*(parse_one(text) for text in unique_texts))
+        by_text = dict(zip(unique_texts, results))
+        return [by_text[text] for text in texts]
+    
+    def _semantic_lookup(self, purpose_text: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Find requirements parsed from a near-identical earlier purpose.
+        
+        Returns:
+            Tuple of the purpose embedding and a copy of the matching
+            requirements; both are None when the semantic cache is disabled
+        """
+        if self.semantic_cache is None:
+            return None, None
+        embedding, cached = self.semantic_cache.lookup(purpose_text)
+        if cached is not None:
+            self.logger.debug("Using requirements parsed from a similar purpose")
+            cached = dict(cached)
+        return embedding, cached
+    
+    def parse_with_watershed(self, purpose_text: str) -> Dict[str, Any]:
+        """
+        Parse purpose and extract the main watershed name in a single request.
+        
+        Args:
+            purpose_text: Natural language description of modeling purpose
+            
+        Returns:
+            Dictionary with 'purpose' (structured requirements) and
+            'watershed' (watershed name as returned by the model, may be empty)
+        """
+        self.logger.info("Parsing modeling purpose and watershed name")
+        self.logger.debug(f"Raw purpose text: {purpose_text}")
+        
+        requirements = self._requirements_from_text(purpose_text, include_watershed=True)
+        watershed = str(requirements.pop('watershed', '') or '').strip()
+        
+        return {
+            'purpose': self._complete_requirements(purpose_text, requirements),
+            'watershed': watershed
+        }
+    
+    def _requirements_from_text(self, purpose_text: str, include_watershed: bool = False) -> Dict[str, Any]:
+        """Extract enhanced requirements, in a single request unless legacy_two_step is set."""
+        if not self.legacy_two_step:
+            return self._extract_and_enhance(purpose_text, include_watershed)
+        
+        basic_requirements = self._extract_basic_requirements(purpose_text, include_watershed)
+        watershed = basic_requirements.pop('watershed', None)
+        if self._is_complete(basic_requirements):
+            self.logger.info("Basic requirements are complete, skipping enhancement")
+            requirements = basic_requirements
+        else:
+            self.logger.info("Enhancing basic requirements")
+            requirements = self._enhance_requirements(purpose_text, basic_requirements)
+        if watershed is not None:
+            requirements['watershed'] = watershed
+        return requirements
+    
+    def _is_complete(self, requirements: Dict[str, Any]) -> bool:
+        """Whether requirements are detailed enough to skip the enhancement request."""
+        if self.enhancement_threshold is None:
+            return False
+        for name, kind, expected_type in self._FIELD_SPEC:
+            value = requirements.get(name)
+            if not value or not isinstance(value, expected_type):
+                return False
+            if kind == 'scale' and any(
+                str(value.get(key, '')).strip().lower() in ('', 'unknown') for key in ('type', 'resolution')
+            ):
+                return False
+        return min(len(requirements['key_processes']), len(requirements['required_outputs'])) >= self.enhancement_threshold
+    
+    @staticmethod
+    def _merge_requirements(basic: Dict[str, Any], enhanced: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Combine independently extracted and enhanced requirements.
+        
+        Lists keep the extracted items first, followed by any new enhanced
+        items; enhanced values take precedence elsewhere, as in the sequential
+        enhancement pass.
+        """
+        merged = dict(basic)
+        for field, value in enhanced.items():
+            stated = basic.get(field)
+            if isinstance(stated, list) and isinstance(value, list):
+                merged[field] = stated + [item for item in value if item not in stated]
+            elif isinstance(stated, dict) and isinstance(value, dict):
+                merged[field] = {**stated, **value}
+            else:
+                merged[field] = value
+        return merged
+    
+    def _complete_requirements(self, purpose_text: str, detailed_requirements: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and save detailed requirements."""
         validated_requirements = self._validate_requirements(detailed_requirements)
         
         # Create ModelingRequirements instance
@@ -65,149 +417,142 @@ class PurposeParser:
         # Return as dictionary for JSON serialization
         return requirements.to_dict()
     
-    def _get_ai_response(self, prompt: str) -> Dict[str, Any]:
+    def _get_ai_response(self, instructions: str, content: str,
+                         tool: Dict[str, Any] = REQUIREMENTS_TOOL) -> Dict[str, Any]:
         """
-        Get and parse response from AI service.
+        Get a structured response from AI service.
         
         Args:
-            prompt: Prompt to send to AI service
+            instructions: Static instructions, sent first and marked for prompt caching
+            content: Request-specific text that follows the instructions
+            tool: Tool the model is required to call; its input is the response
             
         Returns:
-            Parsed JSON response as dictionary
+            Tool input as dictionary
             
         Raises:
-            PurposeParserError: If response cannot be parsed or is invalid
+            PurposeParserError: If the response is missing or invalid
         """
+        cache_path = None
+        if self.enable_cache:
+            cache_path = self._cache_path(instructions + content + json.dumps(tool, sort_keys=True))
+            try:
+                cached = json_loads(cache_path.read_bytes())
+                self.logger.debug("Using cached AI response")
+                return cached
+            except (OSError, json.JSONDecodeError):
+                pass
+        
         try:
             response = self.api.messages.create(
                 model="claude-3-sonnet-20240229",
                 max_tokens=2000,
                 temperature=0,
-                system=(
-                    "You are an expert in hydrological modeling requirements analysis. "
-                    "Extract and structure modeling requirements precisely and comprehensively. "
-                    "Always respond with valid JSON."
-                ),
+                system=[{
+                    "type": "text",
+                    "text": SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"}
+                }],
+                tools=[tool],
+                tool_choice={"type": "tool", "name": tool["name"]},
                 messages=[{
                     "role": "user",
-                    "content": prompt + "\n\nEnsure your response is valid JSON."
-                }]
-            )
-            
-            # Get the response text
-            response_text = response.content[0].text
-            
-            # Try to extract JSON if it's embedded in other text
-            try:
-                # First try direct JSON parsing
-                return json.loads(response_text)
-            except json.JSONDecodeError:
-                # If that fails, try to extract JSON from the text
-                self.logger.debug("Direct JSON parsing failed, attempting to extract JSON from response")
-                import re
-                json_match = re.search(r'\{[\s\S]*\}', response_text)
-                if json_match:
-                    return json.loads(json_match.group(0))
-                else:
-                    raise PurposeParserError(
-                        "Could not extract valid JSON from AI response",
-                        details={"response": response_text}
-                    )
-                
-        except json.JSONDecodeError as e:
-            self.logger.error(f"Failed to parse AI response as JSON: {str(e)}")
-            self.logger.debug(f"Raw response: {response_text}")
-            raise PurposeParserError(
-                "Failed to parse AI response as JSON",
-                details={"error": str(e), "response": response_text}
+                    "content": [
+                        {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+                        {"type": "text", "text": content}
+                    ]
+                }],
+                extra_headers=PROMPT_CACHING_HEADERS
             )
         except Exception as e:
             self.logger.error(f"Error getting AI response: {str(e)}")
             raise PurposeParserError(
                 "Error getting AI response",
                 details={"error": str(e)}
-            )
-
-    def _extract_basic_requirements(self, purpose_text: str) -> Dict[str, Any]:
-        """Extract basic requirements from purpose text."""
-        prompt = f"""
-        Analyze the following modeling purpose and extract key requirements:
-        
-        {purpose_text}
+            ) from e
         
-        Extract and categorize the following aspects:
-        1. Temporal scale and resolution requirements
-        2. Spatial scale and resolution needs
-        3. Key hydrological processes that need to be modeled
-        4. Required model outputs and variables
-        5. Analysis requirements (e.g., uncertainty, sensitivity)
-        6. Any constraints or limitations
-        7. Specific concerns or focus areas
-        
-        Respond with ONLY a JSON object in the following structure:
-        {{
-            "temporal_scale": {{
-                "type": "continuous/event-based/etc",
-                "resolution": "temporal resolution"
-            }},
-            "spatial_scale": {{
-                "type": "distributed/lumped/semi-distributed",
-                "resolution": "spatial resolution"
-            }},
-            "key_processes": ["process1", "process2", ...],
-            "required_outputs": ["output1", "output2", ...],
-            "analysis_requirements": ["requirement1", "requirement2", ...],
-            "constraints": {{
-                "computational": "constraints description",
-                "data": "data availability description"
-            }},
-            "specific_concerns": ["concern1", "concern2", ...]
-        }}
-        
-        Do not include any other text, only the JSON object.
-        """
+        # The forced tool call is the response's only content block
+        result = next((block.input for block in response.content if block.type == "tool_use"), None)
+        if not isinstance(result, dict):
+            raise PurposeParserError(
+                "AI response did not include the requested tool call",
+                details={"stop_reason": getattr(response, "stop_reason", None)}
+            )
         
-        return self._get_ai_response(prompt)
+        if cache_path is not None:
+            self._store_cached_response(cache_path, result)
+        return result
+
+    def _store_cached_response(self, cache_path: Path, result: Dict[str, Any]) -> None:
+        """Write a response to the cache; errors only mean it is requested again."""
+        # Each write gets its own temporary file, so concurrent writers of the
+        # same entry cannot interleave, and the rename is atomic for readers
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError as e:
+            self.logger.warning(f"Could not cache AI response: {str(e)}")
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(json_dumps(result))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.warning(f"Could not cache AI response: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _cache_path(self, prompt: str) -> Path:
+        """Location of the cached response for a prompt."""
+        payload = json.dumps(
+            {"model": "claude-3-sonnet-20240229", "prompt": prompt, "temperature": 0},
+            sort_keys=True
+        ).encode('utf-8')
+        return self.cache_dir / f"{hashlib.sha256(payload).hexdigest()}.json"
+
+    def _extract_and_enhance(self, purpose_text: str, include_watershed: bool = False) -> Dict[str, Any]:
+        """Extract and enhance requirements (and optionally the watershed name) in one request."""
+        if include_watershed:
+            instructions, tool = EXTRACT_AND_ENHANCE_WITH_WATERSHED_INSTRUCTIONS, REQUIREMENTS_WITH_WATERSHED_TOOL
+        else:
+            instructions, tool = EXTRACT_AND_ENHANCE_INSTRUCTIONS, REQUIREMENTS_TOOL
+        return self._get_ai_response(instructions, f"Modeling purpose:\n{purpose_text}", tool)
+
+    def _extract_basic_requirements(self, purpose_text: str, include_watershed: bool = False) -> Dict[str, Any]:
+        """Extract basic requirements (and optionally the watershed name) from purpose text."""
+        if include_watershed:
+            instructions, tool = EXTRACT_WITH_WATERSHED_INSTRUCTIONS, REQUIREMENTS_WITH_WATERSHED_TOOL
+        else:
+            instructions, tool = EXTRACT_INSTRUCTIONS, REQUIREMENTS_TOOL
+        return self._get_ai_response(instructions, f"Modeling purpose:\n{purpose_text}", tool)
 
     def _enhance_requirements(self, purpose_text: str, basic_requirements: Dict[str, Any]) -> Dict[str, Any]:
         """Enhance basic requirements with more specific details."""
-        prompt = f"""
-        Given these basic requirements:
-        {json.dumps(basic_requirements, indent=2)}
-        
-        And this original purpose description:
-        {purpose_text}
-        
-        Enhance the requirements by:
-        1. Identifying any implicit needs not directly stated
-        2. Suggesting additional relevant processes to consider
-        3. Identifying potential challenges or special considerations
-        4. Recommending additional outputs that might be valuable
-        
-        Respond with ONLY a JSON object using the exact same structure as the input:
-        {{
-            "temporal_scale": {{
-                "type": "enhanced type",
-                "resolution": "enhanced resolution"
-            }},
-            "spatial_scale": {{
-                "type": "enhanced type",
-                "resolution": "enhanced resolution"
-            }},
-            "key_processes": ["enhanced process1", "enhanced process2", ...],
-            "required_outputs": ["enhanced output1", "enhanced output2", ...],
-            "analysis_requirements": ["enhanced requirement1", "enhanced requirement2", ...],
-            "constraints": {{
-                "computational": "enhanced constraints",
-                "data": "enhanced data availability"
-            }},
-            "specific_concerns": ["enhanced concern1", "enhanced concern2", ...]
-        }}
-        
-        Do not include any other text, only the JSON object.
-        """
+        content = f"""Basic requirements:
+{json_dumps(basic_requirements).decode('utf-8')}
+
+Original purpose description:
+{purpose_text}"""
         
-        return self._get_ai_response(prompt)
+        return self._get_ai_response(ENHANCE_INSTRUCTIONS, content)
+    
+    # Required fields as (name, kind, expected type); kind selects the default
+    _FIELD_SPEC = (
+        ('temporal_scale', 'scale', dict),
+        ('spatial_scale', 'scale', dict),
+        ('key_processes', 'list', list),
+        ('required_outputs', 'list', list),
+        ('analysis_requirements', 'list', list),
+        ('constraints', 'dict', dict),
+        ('specific_concerns', 'list', list)
+    )
+    
+    _DEFAULTS = {
+        'scale': lambda: {'type': 'unknown', 'resolution': 'unknown'},
+        'list': list,
+        'dict': dict
+    }
     
     def _validate_requirements(self, requirements: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -215,79 +560,47 @@ class PurposeParser:
         
         Ensures all required fields are present and properly formatted.
         """
-        required_fields = {
-            'temporal_scale': {'type': str, 'resolution': str},
-            'spatial_scale': {'type': str, 'resolution': str},
-            'key_processes': list,
-            'required_outputs': list,
-            'analysis_requirements': list,
-            'constraints': dict,
-            'specific_concerns': list
-        }
-        
         validated = {}
-        
-        for field, field_type in required_fields.items():
-            if field not in requirements:
-                self.logger.warning(f"Missing required field: {field}")
-                if field_type == dict:
-                    validated[field] = {}
-                elif field_type == list:
-                    validated[field] = []
-                continue
-                
-            value = requirements[field]
-            
-            if field in ['temporal_scale', 'spatial_scale']:
-                validated[field] = {
-                    'type': str(value.get('type', 'unknown')),
-                    'resolution': str(value.get('resolution', 'unknown'))
-                }
-            elif isinstance(value, field_type):
-                validated[field] = value
-            else:
-                self.logger.warning(f"Invalid type for {field}: expected {field_type}, got {type(value)}")
-                if field_type == dict:
-                    validated[field] = {}
-                elif field_type == list:
-                    validated[field] = []
-        
+        for name, kind, expected_type in self._FIELD_SPEC:
+            validated[name] = self._coerce(name, requirements.get(name), kind, expected_type)
         return validated
     
+    def _coerce(self, name: str, value: Any, kind: str, expected_type: type) -> Any:
+        """Return value in the form its field expects, or the field's default."""
+        if value is None:
+            self.logger.warning(f"Missing required field: {name}")
+            return self._DEFAULTS[kind]()
+        if not isinstance(value, expected_type):
+            self.logger.warning(f"Invalid type for {name}: expected {expected_type}, got {type(value)}")
+            return self._DEFAULTS[kind]()
+        if kind == 'scale':
+            return {key: str(value.get(key, 'unknown')) for key in ('type', 'resolution')}
+        return value
     
-    def _load_requirements_template(self) -> Dict[str, Any]:
-        """Load template for requirements structure."""
-        return {
-            "temporal_scale": {
-                "type": "",
-                "resolution": ""
-            },
-            "spatial_scale": {
-                "type": "",
-                "resolution": ""
-            },
-            "key_processes": [],
-            "required_outputs": [],
-            "analysis_requirements": [],
-            "constraints": {
-                "computational": "",
-                "data": ""
-            },
-            "specific_concerns": []
-        }
     
     def _save_parsed_purpose(self, raw_text: str, requirements: Dict[str, Any]) -> None:
         """Save parsed purpose and requirements for reference."""
         save_data = {
             "raw_purpose": raw_text,
-            "parsed_requirements": requirements,
-            "timestamp": datetime.now().isoformat()
+            "parsed_requirements": requirements
         }
+        # The digest leaves out the timestamp, so re-runs of a purpose match
+        digest = hashlib.blake2b(json_dumps(save_data, sort_keys=True), digest_size=8).hexdigest()
+        with self._save_lock:
+            if digest in self._saved_digests:
+                self.logger.debug(f"Skipping duplicate save of parsed purpose {digest}")
+                return
+            self._saved_digests.add(digest)
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        save_path = self.purpose_dir / f"purpose_analysis_{timestamp}.json"
+        now = datetime.now()
+        save_data["timestamp"] = now.isoformat()
+        # Same-second saves get distinct names, since their digests differ
+        save_path = self.purpose_dir / f"purpose_analysis_{now.strftime('%Y%m%d_%H%M%S')}_{digest}.json"
         
-        with open(save_path, 'w') as f:
-            json.dump(save_data, f, indent=2)
-            
-        self.logger.info(f"Saved parsed purpose to {save_path}")
\ No newline at end of file
+        # Written in the background so saving does not hold up the next parse
+        submit_write(save_path, json_dumps(save_data, indent=True), self.logger)
+        self.logger.info(f"Saving parsed purpose to {save_path}")
+    
+    def flush(self) -> None:
+        """Block until all queued parsed purposes are on disk."""
+        flush_writes()
\ No newline at end of file